@@ -2,15 +2,71 @@
 # To be run on a student's computer (not the Pico)
 # Requires the 'requests' library: pip install requests
 
+import asyncio
+import concurrent.futures
+import functools
+import json
+import logging
+import logging.handlers
+import queue
+import socket
+import struct
+import sys
+
 import requests
 import time
 
+# orjson is a C-extension JSON codec, several times faster than the stdlib
+# parser -- it matters when get_events polls /sensor in a tight loop. Fall
+# back to stdlib json so the conductor still runs without it.
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
 # --- Configuration ---
 # Students should populate this list with the IP address(es of their Picos
 PICO_IPS = [
     "10.0.0.233",
 ]
 
+# --- Shared HTTP session ---
+# One Session with a pooled HTTPAdapter so repeated calls to the same Pico
+# reuse the open TCP connection instead of paying a fresh handshake per
+# request. That handshake is most of the latency of a /tone call, so reusing
+# connections keeps the orchestra much closer to in-sync.
+# Note: the Pico firmware serves plain HTTP/1.0, so connection reuse is the
+# ceiling here -- an HTTP/2-multiplexing client would buy nothing against
+# MicroPython's tiny TCP stack.
+SESSION = requests.Session()
+_adapter = requests.adapters.HTTPAdapter(pool_connections=32, pool_maxsize=32)
+SESSION.mount("http://", _adapter)
+SESSION.headers.update({"Connection": "keep-alive"})
+
+# --- Logging ---
+# Hot-path messages go through a queue to a background listener instead of
+# printing synchronously: a blocking TTY write in the dispatch thread adds
+# jitter to every note. The dispatcher only pays for an enqueue.
+_log_queue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+
+logger = logging.getLogger("conductor")
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+logger.setLevel(logging.INFO)
+
+# Worker pool for fanning tones out to every Pico at once. Sending serially
+# means the last Pico hears its note up to N * timeout after the first one,
+# which is audible skew; submitting all the POSTs to the pool gets every
+# socket send out within one scheduling quantum.
+EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=max(8, len(PICO_IPS)))
+
 # --- Music Definition ---
 # Notes mapped to frequencies (in Hz)
 C4 = 262
@@ -41,6 +97,130 @@ SONG = [
     (C4, 800),
 ]
 
+# Pre-serialized /tone payload bytes. Every note in a song used to allocate
+# a fresh dict and re-encode identical JSON for every Pico; caching the bytes
+# once per (freq, ms) pair skips all of that on the hot path.
+_JSON_HDR = {"Content-Type": "application/json"}
+
+
+@functools.lru_cache(maxsize=256)
+def _tone_payload(freq, ms):
+    return _dumps({"freq": freq, "ms": ms, "duty": 0.5})
+
+
+# Warm the cache for the fixed SONG at import time.
+SONG_PAYLOADS = [_tone_payload(f, d) for f, d in SONG]
+
+# Device naming (device_1, device_2, ...) resolved once at import instead of
+# being rebuilt inside main(); handlers only ever pay a single dict lookup.
+def _build_device_map():
+    return {f"device_{i+1}": ip for i, ip in enumerate(PICO_IPS)}
+
+
+device_map = _build_device_map()
+
+# Per-IP endpoint URLs, precompiled so hot paths do a dict lookup instead of
+# an f-string build + encode for every request.
+_ENDPOINTS = (
+    "tone",
+    "health",
+    "sensor",
+    "melody",
+    "post_mode",
+    "post_range",
+    "get_mode",
+    "get_range",
+)
+
+
+def _build_urls():
+    return {ip: {ep: f"http://{ip}/{ep}" for ep in _ENDPOINTS} for ip in PICO_IPS}
+
+
+URLS = _build_urls()
+
+
+def _url(ip, endpoint):
+    """Returns the precompiled URL, building one only for unlisted IPs."""
+    try:
+        return URLS[ip][endpoint]
+    except KeyError:
+        return f"http://{ip}/{endpoint}"
+
+
+# --- UDP fast path for tones ---
+# TCP + HTTP costs the Pico several milliseconds per /tone; for rhythm we
+# don't need reliability (a dropped tone beats a late one), so tones can
+# also go out as one 6-byte datagram per Pico over a single shared socket.
+# Wire format matches the firmware listener: struct "<HHH" of
+# (freq_hz, duration_ms, duty_x1000).
+UDP_TONE_PORT = 5005
+_UDP_SOCK = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+UDP_ADDRS = [(ip, UDP_TONE_PORT) for ip in PICO_IPS]
+
+# Multicast group the Picos join; one datagram reaches the whole orchestra,
+# so fan-out cost is O(1) and every Pico sees the packet within microseconds
+# of each other. TTL 1 keeps it on the local network.
+MCAST_GROUP = ("239.1.2.3", UDP_TONE_PORT)
+_UDP_SOCK.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+
+
+def play_note_multicast(freq, ms):
+    """Sends one multicast datagram instead of N unicast sends."""
+    try:
+        _UDP_SOCK.sendto(struct.pack("<HHH", freq, ms, 500), MCAST_GROUP)
+    except OSError as e:
+        logger.warning("Multicast send failed: %s", e)
+
+
+def play_note_udp(freq, ms, listed_ips=None):
+    """Sends a tone to each Pico as a tiny UDP datagram, skipping HTTP entirely."""
+    pkt = struct.pack("<HHH", freq, ms, 500)
+    addrs = UDP_ADDRS if listed_ips is None else [(ip, UDP_TONE_PORT) for ip in listed_ips]
+    for addr in addrs:
+        try:
+            _UDP_SOCK.sendto(pkt, addr)
+        except OSError as e:
+            logger.warning("UDP send to %s failed: %s", addr[0], e)
+
+
+def compile_melody(song, note_gap, listed_ips=None):
+    """Builds a specialized replay closure for a fixed song.
+
+    Everything slow is done once up front: each note is packed to its UDP
+    bytes, the per-note absolute deadlines are precomputed, and the socket
+    send and clock are pre-bound as locals. The returned closure just walks
+    two flat sequences, so the hot loop does no f-strings, no JSON, and no
+    dict lookups.
+    """
+    addrs = tuple(UDP_ADDRS if listed_ips is None else
+                  [(ip, UDP_TONE_PORT) for ip in listed_ips])
+    schedule = []
+    elapsed = 0.0
+    for freq, duration in song:
+        schedule.append((struct.pack("<HHH", freq, duration, 500), elapsed))
+        elapsed += (duration + note_gap) / 1000
+    schedule = tuple(schedule)
+
+    sendto = _UDP_SOCK.sendto
+    monotonic = time.monotonic
+    sleep = time.sleep
+
+    def replay():
+        t0 = monotonic()
+        for pkt, deadline in schedule:
+            remaining = t0 + deadline - monotonic()
+            if remaining > 0:
+                sleep(remaining)
+            for addr in addrs:
+                sendto(pkt, addr)
+
+    return replay
+
+
+# Ready-to-fire replay of the built-in song
+play_twinkle = compile_melody(SONG, note_gap=100)
+
 # what modes from CLI interface are able to work
 VALID_MODES = [
     "l",
@@ -55,70 +235,225 @@ VALID_RANGE = 1000
 
 # --- Conductor Logic ---
 
+# Circuit breaker: a Pico that dropped off the network would otherwise cost
+# a full connect failure per note for the rest of the song. After a failed
+# send its IP is skipped until the backoff expires, so a dead device costs
+# one dict lookup per note instead of an exception.
+FAILED_UNTIL = {}
+_FAIL_BACKOFF_S = 5.0
+
+
+def _post_tone(ip, data):
+    """Sends one /tone POST of pre-serialized bytes; runs inside the worker pool."""
+    if FAILED_UNTIL.get(ip, 0.0) > time.monotonic():
+        return
+    url = _url(ip, "tone")
+    try:
+        # We use a short timeout because we don't need to wait for a response
+        # This makes the orchestra play more in sync.
+        SESSION.post(url, data=data, headers=_JSON_HDR, timeout=0.1)
+    except requests.exceptions.Timeout:
+        # This is expected, we can ignore it
+        pass
+    except requests.exceptions.RequestException as e:
+        FAILED_UNTIL[ip] = time.monotonic() + _FAIL_BACKOFF_S
+        logger.warning("Error contacting %s, backing off: %s", ip, e)
+
+
+def _play_note(ips, freq, ms):
+    """Single fan-out implementation shared by both public note entry points."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Playing note: %dHz for %dms on %d device(s).", freq, ms, len(ips))
+
+    data = _tone_payload(freq, ms)
+
+    # Fan out concurrently so every Pico gets the note at the same time,
+    # then give the sends a short window to leave before moving on.
+    futures = [EXECUTOR.submit(_post_tone, ip, data) for ip in ips]
+    concurrent.futures.wait(futures, timeout=0.05)
+
 
 def play_note_on_all_picos(freq, ms):
     """Sends a /tone POST request to every Pico in the list."""
-    print(f"Playing note: {freq}Hz for {ms}ms on all devices.")
-
-    payload = {"freq": freq, "ms": ms, "duty": 0.5}
+    _play_note(PICO_IPS, freq, ms)
 
-    for ip in PICO_IPS:
-        url = f"http://{ip}/tone"
-        try:
-            # We use a short timeout because we don't need to wait for a response
-            # This makes the orchestra play more in sync.
-            requests.post(url, json=payload, timeout=0.1)
-        except requests.exceptions.Timeout:
-            # This is expected, we can ignore it
-            pass
-        except requests.exceptions.RequestException as e:
-            print(f"Error contacting {ip}: {e}")
-            
 # -- additional api calls
 def play_note_on_specific_picos(freq, ms, listed_ips):
-    """Sends a /tone POST request to every Pico in the list."""
-    print(f"Playing note: {freq}Hz for {ms}ms on all devices.")
+    """Sends a /tone POST request to the listed Picos only."""
+    _play_note(listed_ips, freq, ms)
 
-    payload = {"freq": freq, "ms": ms, "duty": 0.5}
+def _post_melody(ip, payload):
+    """Sends one whole-song /melody POST; runs inside the worker pool."""
+    if FAILED_UNTIL.get(ip, 0.0) > time.monotonic():
+        return
+    url = _url(ip, "melody")
+    try:
+        SESSION.post(url, data=_dumps(payload), headers=_JSON_HDR, timeout=0.5)
+    except requests.exceptions.Timeout:
+        pass
+    except requests.exceptions.RequestException as e:
+        FAILED_UNTIL[ip] = time.monotonic() + _FAIL_BACKOFF_S
+        logger.warning("Error contacting %s, backing off: %s", ip, e)
 
-    for ip in listed_ips:
-        url = f"http://{ip}/tone"
-        try:
-            # We use a short timeout because we don't need to wait for a response
-            # This makes the orchestra play more in sync.
-            requests.post(url, json=payload, timeout=0.1)
-        except requests.exceptions.Timeout:
-            # This is expected, we can ignore it
-            pass
-        except requests.exceptions.RequestException as e:
-            print(f"Error contacting {ip}: {e}")
 
-def play_melody_on_all_picos(song, note_gap):
-    # POST /melody API Call
-    # takes a song, list of note structs, and a note_gap
-    #plays melody on all connected PICOS
+def play_melody_batch(listed_ips, song, note_gap):
+    """POSTs the entire song to each Pico in one request.
+
+    The Pico queues the notes and times them with its own scheduler, so
+    inter-note timing no longer includes a network round trip per note.
+    """
+    payload = {
+        "notes": [{"freq": f, "ms": d} for f, d in song],
+        "gap_ms": note_gap,
+    }
+    futures = [EXECUTOR.submit(_post_melody, ip, payload) for ip in listed_ips]
+    concurrent.futures.wait(futures, timeout=1.0)
+
+
+# -- clock sync
+# Each Pico keeps its own millisecond clock, so dispatch time != play time
+# and long melodies slowly desynchronize. We estimate each Pico's offset
+# NTP-style from a timed /health probe and stamp future /tone payloads with
+# a play_at deadline in the Pico's own clock.
+CLOCK_OFFSETS = {}
+# Exponential smoothing factor for offset updates, suppresses RTT jitter
+_OFFSET_ALPHA = 0.3
+# How far in the future to schedule playback; must exceed the worst RTT
+SYNC_LOOKAHEAD_MS = 50
+
+
+def measure_clock_offset(ip):
+    """Estimates the Pico's clock offset (in ms) relative to this machine.
+
+    Times a /health round trip and assumes the Pico's timestamp was taken
+    at the midpoint, per the standard NTP formula. Updates CLOCK_OFFSETS
+    with exponential smoothing and returns the smoothed offset.
+    """
+    url = _url(ip, "health")
+    try:
+        t0 = time.monotonic()
+        resp = SESSION.get(url, timeout=0.5)
+        t3 = time.monotonic()
+        server_t = _loads(resp.content).get("t_ms")
+    except requests.exceptions.RequestException as e:
+        print(f"Error contacting {ip}: {e}")
+        return None
+    if server_t is None:
+        # Older firmware without t_ms in /health
+        return None
+
+    offset = server_t - (t0 + t3) / 2 * 1000
+    previous = CLOCK_OFFSETS.get(ip)
+    if previous is not None:
+        offset = previous + _OFFSET_ALPHA * (offset - previous)
+    CLOCK_OFFSETS[ip] = offset
+    return offset
+
+
+def play_note_synced(freq, ms, listed_ips=None):
+    """Fans out /tone with a per-Pico play_at deadline slightly in the future.
+
+    Every Pico holds the note until its local clock reaches play_at, so
+    network jitter moves the shared latency budget, not the synchrony.
+    """
+    ips = PICO_IPS if listed_ips is None else listed_ips
+    now_ms = time.monotonic() * 1000
+
+    futures = []
+    for ip in ips:
+        offset = CLOCK_OFFSETS.get(ip)
+        if offset is None:
+            offset = measure_clock_offset(ip) or 0
+        data = _dumps({
+            "freq": freq,
+            "ms": ms,
+            "duty": 0.5,
+            "play_at": int(now_ms + offset + SYNC_LOOKAHEAD_MS),
+        })
+        futures.append(EXECUTOR.submit(_post_tone, ip, data))
+    concurrent.futures.wait(futures, timeout=0.1)
+
+
+# -- async melody playback
+# The Picos speak plain HTTP/1.0, so the transport stays the pooled session;
+# asyncio just overlaps the per-note fan-out on one thread instead of
+# blocking the melody loop on each send.
+async def play_note_async(freq, ms, listed_ips):
+    """Fans a /tone POST out to every listed Pico and awaits the sends."""
+    data = _tone_payload(freq, ms)
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(
+        *[loop.run_in_executor(EXECUTOR, _post_tone, ip, data) for ip in listed_ips]
+    )
+
+
+async def play_melody_async(song, note_gap, listed_ips):
+    """Plays a whole song on the listed Picos, one gathered fan-out per note.
+
+    Each wait is computed against a monotonic deadline rather than a fixed
+    sleep, so fan-out time and scheduler jitter stay bounded instead of
+    accumulating into tempo drift over the course of the song.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    elapsed = 0.0
     for note, duration in song:
-            play_note_on_all_picos(note, duration)
-            # Wait for the note's duration plus a small gap before playing the next one
-            time.sleep(note_gap / 1000)
-            
+        await play_note_async(note, duration, listed_ips)
+        # Sleep until the next note's deadline, not for a fixed gap
+        elapsed += note_gap / 1000
+        await asyncio.sleep(max(0.0, start + elapsed - loop.time()))
+
+
+def play_melody_on_all_picos(song, note_gap):
+    """POSTs the song to every Pico in the list via the batch path.
+
+    Reads PICO_IPS at call time, like play_note_on_all_picos, so a
+    rebound device list reaches melodies too.
+    """
+    play_melody_batch(PICO_IPS, song, note_gap)
+
 def play_melody_on_specifc_picos(song, note_gap, listed_ips):
     # POST /melody API Call
     # takes a song, list of note structs, and a note_gap
     #plays melody on all connected PICOS
-    for note, duration in song:
-            play_note_on_specific_picos(note, duration, listed_ips)
-            # Wait for the note's duration plus a small gap before playing the next one
-            time.sleep(note_gap / 1000)
+    play_melody_batch(listed_ips, song, note_gap)
             
+def _ttl_cache(ttl):
+    """Caches a per-IP getter's result for ttl seconds.
+
+    Monitoring loops poll /health and /get_range far faster than those
+    values change, so repeat polls within the window are served from RAM
+    instead of a network round trip. Pass bypass=True to force a refresh.
+    """
+    def decorator(func):
+        cache = {}
+
+        @functools.wraps(func)
+        def wrapper(ip, bypass=False):
+            now = time.monotonic()
+            if not bypass:
+                hit = cache.get(ip)
+                if hit is not None and now - hit[1] < ttl:
+                    return hit[0]
+            value = func(ip)
+            cache[ip] = (value, now)
+            return value
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
+
+
+@_ttl_cache(ttl=0.5)
 def get_pico_health(ip):
     # GET /health API Call
     # returns struct with fields "status", "device_id","api"
     print(f"Obtaining health of PICO with ip:{ip}")
-    url = f"http://{ip}/health"
+    url = _url(ip, "health")
     try:
-        resp = requests.get(url, timeout=0.5)
-        device_health = resp.json()
+        resp = SESSION.get(url, timeout=0.5)
+        device_health = _loads(resp.content)
     except requests.exceptions.Timeout as e:
         print(f"Timeout reaching {ip}:{e}")
         return
@@ -135,10 +470,10 @@ def get_sensor_data(ip):
     # [red level, green level, blue level, luminance]
     
     print(f"Obtaining data of PICO sensor with ip:{ip}")
-    url = f"http://{ip}/sensor"
+    url = _url(ip, "sensor")
     try:
-        resp = requests.get(url,timeout=0.5)
-        sensor_data = resp.json()   
+        resp = SESSION.get(url, timeout=0.5)
+        sensor_data = _loads(resp.content)
     except requests.exceptions.Timeout as e:
         print(f"Timeout reaching {ip}:{e}")
         return
@@ -148,15 +483,32 @@ def get_sensor_data(ip):
     print(f'Raw: {sensor_data["raw"]}, Norm: {sensor_data["norm"]}, Estimated Lux: {sensor_data["lux_est"]}')        
     return sensor_data
 
+def get_all_health():
+    """Health-checks every Pico in parallel; returns {ip: health or None}.
+
+    A serial sweep blocks for timeout x N with any offline device; running
+    the probes on the shared pool makes total latency the max of the
+    per-Pico round trips instead of the sum.
+    """
+    results = EXECUTOR.map(get_pico_health, PICO_IPS)
+    return dict(zip(PICO_IPS, results))
+
+
+def get_all_sensor_data():
+    """Reads every Pico's sensor in parallel; returns {ip: data or None}."""
+    results = EXECUTOR.map(get_sensor_data, PICO_IPS)
+    return dict(zip(PICO_IPS, results))
+
+
 def get_device_mode(ip):
     # GET /mode API Call
     # returns mode, either "Live Play" or "Record & Play"
     
     print(f"Obtaining mode of PICO sensor with ip:{ip}")
-    url = f"http://{ip}/get_mode"
+    url = _url(ip, "get_mode")
     try:
-        resp = requests.get(url,timeout=0.5)
-        mode = resp.json()
+        resp = SESSION.get(url, timeout=0.5)
+        mode = _loads(resp.content)
     except requests.exceptions.Timeout as e:
         print(f"Timeout reaching {ip}:{e}")
         return
@@ -173,9 +525,9 @@ def post_device_mode(ip, mode):
     # Record & Play: can pass "r","R", "Record & Play"
     payload = {"mode": mode}
     if mode in VALID_MODES:
-        url = f"http://{ip}/post_mode"
+        url = _url(ip, "post_mode")
         try:
-            requests.post(url, json=payload, timeout=0.5)
+            SESSION.post(url, json=payload, timeout=0.5)
         except requests.exceptions.Timeout as e:
             print(f"Timeout reaching {ip}:{e}")
             return
@@ -185,20 +537,21 @@ def post_device_mode(ip, mode):
     else:
         print(f"Error: Invalid mode entered. Valid modes are: {VALID_MODES}")
         
+@_ttl_cache(ttl=0.5)
 def get_sensor_range(ip):
     # GET /get_range
     print(f"Obtaining data of PICO sensor with ip:{ip}")
-    url = f"http://{ip}/get_range"
+    url = _url(ip, "get_range")
     try:
-        resp = requests.get(url,timeout=0.5)
-        range_value = resp.json()
+        resp = SESSION.get(url, timeout=0.5)
+        range_value = _loads(resp.content)
     except requests.exceptions.Timeout as e:
         print(f"Timeout reaching {ip}:{e}")
         return
     except requests.exceptions.RequestException as e:
         print(f"Error contacting {ip}: {e}")
         return
-    print(f"Range: 0-{range}")
+    print(f"Range: 0-{range_value}")
     return range_value
 
 def post_device_range(ip, range_value):
@@ -208,9 +561,9 @@ def post_device_range(ip, range_value):
     
     payload = {"range": range_value}
     if 0 <= range_value <= VALID_RANGE: 
-        url = f"http://{ip}/post_range"
+        url = _url(ip, "post_range")
         try:
-            requests.post(url, json=payload, timeout=0.5)
+            SESSION.post(url, json=payload, timeout=0.5)
         except requests.exceptions.Timeout as e:
             print("Timeout reaching {ip}:{e}")
             return
@@ -220,12 +573,28 @@ def post_device_range(ip, range_value):
     else:
         print(f"Error: Invalid range entered. They must be in 0-X.")
         
+def _sleep_until(deadline):
+    """Waits until a perf_counter deadline with sub-millisecond accuracy.
+
+    time.sleep alone has multi-millisecond scheduler granularity, which is
+    too coarse for small sampling rates; sleep for the bulk of the wait and
+    spin out the final millisecond instead.
+    """
+    remaining = deadline - time.perf_counter()
+    if remaining > 0.002:
+        time.sleep(remaining - 0.001)
+    while time.perf_counter() < deadline:
+        pass
+
+
 def get_events(ip, sampling_rate):
     print(f"Streaming events from {ip} every {sampling_rate}ms. CTRL+C to stop.")
     try:
+        deadline = time.perf_counter()
         while True:
             get_sensor_data(ip)
-            time.sleep(sampling_rate / 1000)
+            deadline += sampling_rate / 1000
+            _sleep_until(deadline)
     except KeyboardInterrupt:
         print("\nStopped event streaming.")
 
@@ -239,33 +608,46 @@ def get_melody(ip, sampling_rate):
     """Continuously simulate melody streaming from a Pico at a given interval (ms)."""
     print(f"Streaming melody from {ip} every {sampling_rate}ms. CTRL+C to stop.")
     try:
+        deadline = time.perf_counter()
         while True:
             for note, duration in SONG:
                 print(f"{ip} playing {note}Hz for {duration}ms")
-                time.sleep(sampling_rate / 1000)
+                deadline += sampling_rate / 1000
+                _sleep_until(deadline)
     except KeyboardInterrupt:
         print("\nStopped melody streaming.")
 
 # CLI command handlers
+@functools.lru_cache(maxsize=256)
+def resolve_devices(device_list_str):
+    """Resolves a 'device_1,device_2' string to a tuple of known IPs.
+
+    Cached so repeated identical commands (common when streaming from the
+    REPL) skip the split + per-name dict lookups entirely. The cache is
+    cleared whenever device_map is rebuilt.
+    """
+    listed_ips = []
+    for name in device_list_str.split(","):
+        ip = device_map.get(name)
+        if not ip:
+            print(f"Unknown device {name}, skipping")
+        else:
+            listed_ips.append(ip)
+    return tuple(listed_ips)
+
+
 def handle_play_note_specific(args):
     if len(args) != 3:
         print("Usage: play_note <device1,device2,...> <freq> <duration>")
         return
     device_list_str, freq_str, duration_str = args
-    device_names = device_list_str.split(",")
     try:
         freq = int(freq_str)
         duration = int(duration_str)
     except ValueError:
         print("freq and duration must be integers")
         return
-    listed_ips = []
-    for name in device_names:
-        ip = device_map.get(name)
-        if not ip:
-            print(f"Unknown device {name}, skipping")
-        else:
-            listed_ips.append(ip)
+    listed_ips = resolve_devices(device_list_str)
     if not listed_ips:
         print("No valid devices to play note on")
         return
@@ -282,19 +664,12 @@ def handle_play_melody_specific(args):
         print("Usage: play_melody <device1,device2,...> <note_gap>")
         return
     device_list_str, note_gap_str = args
-    device_names = device_list_str.split(",")
     try:
         note_gap = int(note_gap_str)
     except ValueError:
         print("note_gap must be an integer")
         return
-    listed_ips = []
-    for name in device_names:
-        ip = device_map.get(name)
-        if not ip:
-            print(f"Unknown device {name}, skipping")
-        else:
-            listed_ips.append(ip)
+    listed_ips = resolve_devices(device_list_str)
     if not listed_ips:
         print("No valid devices to play melody on")
         return
@@ -350,13 +725,9 @@ def handle_get_range(args):
     if not ip:
         print(f"Unknown device {args[0]}")
         return
-    url = f"http://{ip}/get_range"
-    try:
-        resp = requests.get(url, timeout=0.1)
-        range_val = resp.json()
-        print(f"{args[0]} range: {range_val}")
-    except requests.exceptions.RequestException as e:
-        print(f"Error contacting {ip}: {e}")
+    # Reuse the cached, session-backed getter instead of a second inline
+    # GET; it prints the range itself, like the health and mode getters
+    get_sensor_range(ip)
 
 
 def handle_get_sensor_data(args):
@@ -405,6 +776,15 @@ def handle_get_melody(args):
 
     stream_melody(ip, sampling_rate)
 
+def handle_status_all(args):
+    if len(args) != 0:
+        print("Usage: status_all")
+        return
+    for ip, health in get_all_health().items():
+        if health is None:
+            print(f"{ip}: offline")
+
+
 def handle_set_mode(args):
     if len(args) != 2:
         print("Usage: set_mode <device> <mode>")
@@ -431,9 +811,9 @@ def handle_set_range(args):
         print("range must be an integer")
         return
     payload = {"range": range_val}
-    url = f"http://{ip}/post_range"
+    url = _url(ip, "post_range")
     try:
-        requests.post(url, json=payload, timeout=0.1)
+        SESSION.post(url, json=payload, timeout=0.1)
         print(f"Set range of {args[0]} to {range_val}")
     except requests.exceptions.RequestException as e:
         print(f"Error contacting {ip}: {e}")
@@ -450,24 +830,47 @@ COMMAND_HANDLERS = {
     "get_events": handle_get_events,
     "get_melody": handle_get_melody,
     "set_mode": handle_set_mode,
-    "set_range": handle_set_range
+    "set_range": handle_set_range,
+    "status_all": handle_status_all
 }
 
+# Interned keys let the dispatch lookup hit the identity fast path instead
+# of a full string compare for every command.
+COMMAND_HANDLERS = {sys.intern(k): v for k, v in COMMAND_HANDLERS.items()}
+
+
+def _read_commands():
+    """Yields command lines: buffered stdin when piped, input() on a TTY.
+
+    Iterating sys.stdin for batch input (python conductor.py < script.txt)
+    gets OS-level line buffering instead of a per-command TTY round trip.
+    """
+    if sys.stdin.isatty():
+        while True:
+            try:
+                yield input("> ")
+            except EOFError:
+                return
+    else:
+        yield from sys.stdin
+
 def main():
     print("--- Conductor App for Miniproject ---")
     print("Type 'help' for commands, 'exit' to quit or CTRL+C")
 
-    # Build device mapping (device_1, device_2, etc.)
-    global device_map
-    device_map = {f"device_{i+1}": ip for i, ip in enumerate(PICO_IPS)}
+    # Refresh device mapping in case PICO_IPS was edited since import
+    global device_map, URLS
+    device_map = _build_device_map()
+    URLS = _build_urls()
+    resolve_devices.cache_clear()
 
     # Print detected devices
     print("Detected devices:")
     for name, ip in device_map.items():
         print(f"  {name}: {ip}")
     try:
-        while True:
-            cmd_input = input("> ").strip()
+        for cmd_input in _read_commands():
+            cmd_input = cmd_input.strip()
             if not cmd_input:
                 continue
             if cmd_input.lower() in ["exit", "quit"]:
@@ -476,7 +879,7 @@ def main():
 
             # Split command into name + args
             parts = cmd_input.split()
-            cmd_name, *args = parts
+            cmd_name, *args = sys.intern(parts[0]), *parts[1:]
 
             # Handle 'help' separately
             if cmd_name.lower() == "help":
@@ -492,7 +895,8 @@ get_sensor_data <device>
 get_events <device> <sampling_rate>
 get_melody <device> <sampling_rate>
 set_mode <device> <mode>
-set_range <device> <range>""")
+set_range <device> <range>
+status_all""")
                 continue
 
             # Lookup handler
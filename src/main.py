@@ -1,22 +1,71 @@
 # main.py - Enhanced Pico Light Orchestra Firmware
 # With proper calibration and Record & Play functionality
 
+import array
 import machine
 import time
 import network
-import json
+
+# Bind the C JSON implementation directly where available; "json" can
+# resolve to a slower wrapper depending on the MicroPython build.
+try:
+    import ujson as json
+except ImportError:
+    import json
+
 import asyncio
 import gc
+import socket
+import struct
 import ubinascii
 
+# micropython.native/viper emit machine code on the Pico, skipping the
+# bytecode dispatch loop; under CPython (tests) they become no-ops.
+try:
+    from micropython import native, viper
+except ImportError:
+    def native(f):
+        return f
+    viper = native
+
 # --- Pin Configuration ---
 photo_sensor_pin = machine.ADC(26)  # ADC0 on GP26
 buzzer_pin = machine.PWM(machine.Pin(16))
 
+# --- ADC burst sampling ---
+# The RP2040 ADC can free-run at 500 kS/s into its hardware FIFO, so the
+# sensor loop can drain a short burst and average it instead of paying a
+# Python-level read_u16 call for a single noisy sample. Register-level
+# setup; attempted once at startup and falls back to plain reads if the
+# registers aren't there (e.g. when imported under CPython for tests).
+_ADC_CS = 0x4004C000
+_ADC_FCS = 0x4004C008
+_ADC_FIFO = 0x4004C00C
+_ADC_DIV = 0x4004C010
+_adc_burst = False
+
+def _setup_adc_burst():
+    """Puts the ADC in free-running mode with the FIFO enabled."""
+    global _adc_burst
+    try:
+        mem32 = machine.mem32
+        mem32[_ADC_FCS] = 0x01  # FCS.EN: route conversions into the FIFO
+        mem32[_ADC_DIV] = 96 << 8  # 48 MHz / 96 = 500 kS/s
+        # AINSEL=0 (GP26), START_MANY, EN
+        mem32[_ADC_CS] = (0 << 12) | 0x08 | 0x01
+        _adc_burst = True
+    except (AttributeError, TypeError, OSError):
+        _adc_burst = False
+
 # Button pins for Record & Play control
 button1_pin = machine.Pin(14, machine.Pin.IN, machine.Pin.PULL_UP)  # Start/Stop recording
 button2_pin = machine.Pin(15, machine.Pin.IN, machine.Pin.PULL_UP)  # Playback
 
+# Request logging: print() is synchronous UART output on the Pico
+# (roughly a millisecond per line), so per-request logging serializes
+# the event loop under client latency. Off by default.
+DEBUG = False
+
 # --- Global State ---
 device_id = ubinascii.hexlify(machine.unique_id()).decode()
 current_mode = "Live Play"
@@ -29,31 +78,76 @@ ambient_light_floor = 30000  # Will be set during calibration
 ambient_light_ceiling = 40000  # Will be set during calibration
 calibrated = False
 
-# Recording variables
-recorded_melody = []
+# Hot-path copies of the calibration window, kept as plain ints so
+# sensor_loop does no branching or float/int conversion per sample.
+# Defaults match read_sensor_calibrated's uncalibrated fallback range.
+_cal_floor = 1000
+_cal_span = 49000
+
+# Recording variables. Events live in parallel typed arrays preallocated
+# once at boot: appending is three array stores and a counter bump, so
+# recording never allocates on the heap mid-loop (no GC pauses at 40 Hz).
+# 512 events is plenty now that boundary jitter is debounced out of the
+# stream (see the 30 ms gate in sensor_loop).
+MAX_EVENTS = 512
+_rec_time = array.array("I", bytes(4 * MAX_EVENTS))
+_rec_freq = array.array("H", bytes(2 * MAX_EVENTS))
+_rec_duty = array.array("H", bytes(2 * MAX_EVENTS))
+_rec_len = 0
 recording_start_time = 0
 is_recording = False
 is_playing_back = False
-last_button1_state = 1
-last_button2_state = 1
 
 # Musical scale
 NOTES = [262, 294, 330, 349, 392, 440, 494, 523, 587, 659, 698, 784]  # C4 to B4
 
+# UDP tone port; the conductor sends 6-byte "<HHH" packets
+# of (freq_hz, duration_ms, duty_x1000) here instead of HTTP POSTs
+UDP_TONE_PORT = 5005
+MCAST_GROUP = "239.1.2.3"
+
 # --- Calibration Functions ---
 
+@viper
+def _cal_scan(out, duration_ms: int):
+    """Min/max scan of the raw ADC RESULT register for duration_ms.
+
+    Runs only when the ADC free-runs (_adc_burst); reading the RESULT
+    MMIO register from viper samples at tens of kHz instead of the 100 Hz
+    Python loop, so the true floor/ceiling actually get captured. Writes
+    the 12-bit lo/hi into out[0]/out[1].
+    """
+    res = ptr32(0x4004C004)  # ADC RESULT register
+    buf = ptr32(out)
+    lo = 0xFFF
+    hi = 0
+    start = int(time.ticks_ms())
+    while int(time.ticks_diff(int(time.ticks_ms()), start)) < duration_ms:
+        v = res[0] & 0xFFF
+        if v < lo:
+            lo = v
+        if v > hi:
+            hi = v
+    buf[0] = lo
+    buf[1] = hi
+
+@native
 def calibrate_sensor(duration_ms=3000):
     """
     Calibrate the sensor by finding min/max values over a period.
     User should cover and uncover the sensor during calibration.
     """
     global ambient_light_floor, ambient_light_ceiling, calibrated
-    
+    global _cal_floor, _cal_span, _range_json, _health_tmpl, _index_prefix
+
     print("=== CALIBRATION START ===")
     print("Move your hand over the sensor for 3 seconds...")
     print("Cover it completely and expose it to light")
     
-    samples = []
+    # Running min/max instead of a samples list: O(1) memory and no
+    # heap churn (the old list guaranteed a GC cycle mid-calibration)
+    lo = 65535
+    hi = 0
     start_time = time.ticks_ms()
     
     # Blink LED/buzzer to indicate calibration
@@ -65,13 +159,24 @@ def calibrate_sensor(duration_ms=3000):
         time.sleep(0.2)
     
     # Collect samples
-    while time.ticks_diff(time.ticks_ms(), start_time) < duration_ms:
-        samples.append(photo_sensor_pin.read_u16())
-        time.sleep(0.01)
-    
-    # Calculate floor (darkest) and ceiling (brightest)
-    ambient_light_floor = min(samples)
-    ambient_light_ceiling = max(samples)
+    if _adc_burst:
+        # Hardware path: viper scan of the free-running RESULT register
+        scan = array.array("i", [0, 0])
+        _cal_scan(scan, duration_ms)
+        lo = scan[0] << 4  # 12-bit back to read_u16 scale
+        hi = scan[1] << 4
+    else:
+        while time.ticks_diff(time.ticks_ms(), start_time) < duration_ms:
+            v = photo_sensor_pin.read_u16()
+            if v < lo:
+                lo = v
+            if v > hi:
+                hi = v
+            time.sleep(0.01)
+
+    # Floor (darkest) and ceiling (brightest)
+    ambient_light_floor = lo
+    ambient_light_ceiling = hi
     
     # Add some padding to avoid edge cases
     margin = (ambient_light_ceiling - ambient_light_floor) * 0.1
@@ -83,7 +188,14 @@ def calibrate_sensor(duration_ms=3000):
         ambient_light_ceiling = ambient_light_floor + 1000
     
     calibrated = True
-    
+
+    # Refresh the precomputed hot-path window and drop stale payloads
+    _cal_floor = int(ambient_light_floor)
+    _cal_span = int(ambient_light_ceiling) - _cal_floor
+    _range_json = None
+    _health_tmpl = None
+    _index_prefix = None
+
     # Success beep
     buzzer_pin.freq(523)
     buzzer_pin.duty_u16(20000)
@@ -129,6 +241,71 @@ def light_to_note_index(norm_value, sensitivity=None):
     note_index = int(adjusted * (len(NOTES) - 1))
     return max(0, min(len(NOTES) - 1, note_index))
 
+# 256-entry table mapping a quantized light level straight to a buzzer
+# frequency. The RP2040 has no FPU, so the norm ** (2.0 - sensitivity)
+# curve used to cost an emulated float pow per sample; baking the curve
+# AND the NOTES lookup in here leaves the hot path one table read.
+_freq_lut = array.array("H", bytes(2 * 256))
+
+
+def _build_freq_lut(sensitivity=None):
+    """Rebuilds the light-to-frequency table; call if sensitivity changes."""
+    if sensitivity is None:
+        sensitivity = sensor_range / 100.0
+    exponent = 2.0 - sensitivity
+    for i in range(256):
+        _freq_lut[i] = NOTES[min(11, int((i / 255.0) ** exponent * 11))]
+
+
+_build_freq_lut()
+
+
+@viper
+def _process_sample(raw: int, floor: int, span: int) -> int:
+    """Hot per-tick math for sensor_loop: quantize and look up a frequency.
+
+    Pure integer math compiled with the viper emitter; the sensitivity
+    curve and note table live in _freq_lut. Returns 0 when the reading
+    is below the noise threshold (silence).
+    """
+    # Branchless clamp of the pre-scale value into [0, span]: the sign
+    # bit of (v) / (v - span), smeared by the arithmetic shift, masks the
+    # correction term, so there are no compare-and-jump sequences in the
+    # emitted code.
+    v = raw - floor
+    v &= ~(v >> 31)
+    t = v - span
+    v -= t & ~(t >> 31)
+    q = (v * 255) // span
+    if q <= 12:  # ~0.05 of full scale, threshold to avoid noise
+        return 0
+    return int(_freq_lut[q])
+
+# Fused per-tick kernels: one function call from sensor_loop does the
+# ADC read, normalization and frequency lookup, instead of a read call
+# plus a _process_sample call. Which one runs is picked once at loop
+# start depending on whether the ADC FIFO path came up.
+
+@native
+def _sense_burst(floor, span):
+    """FIFO path: drain-and-average plus _process_sample in one call."""
+    mem32 = machine.mem32
+    total = 0
+    n = 0
+    while n < 8 and (mem32[_ADC_FCS] >> 16) & 0xF:
+        total += mem32[_ADC_FIFO] & 0xFFF
+        n += 1
+    if n == 0:
+        raw = photo_sensor_pin.read_u16()
+    else:
+        raw = (total // n) << 4
+    return _process_sample(raw, floor, span)
+
+@native
+def _sense_plain(floor, span):
+    """Fallback path: plain read_u16 plus _process_sample in one call."""
+    return _process_sample(photo_sensor_pin.read_u16(), floor, span)
+
 def stop_tone():
     """Stop any sound."""
     try:
@@ -140,12 +317,19 @@ def stop_tone():
 
 def start_recording():
     """Start recording a melody."""
-    global is_recording, recording_start_time, recorded_melody
-    
+    global is_recording, recording_start_time, _rec_len, _mode_json
+    global _last_freq, _last_change_time
+
     if current_mode != "Record & Play":
         return False
-    
-    recorded_melody = []
+
+    _rec_len = 0
+    _mode_json = None
+    # Reset the debounce gate: event times are relative to this session's
+    # start, so a stale timestamp from a previous recording would hold
+    # the 30 ms gate shut and silently drop the new session's events
+    _last_freq = 0
+    _last_change_time = -1000
     recording_start_time = time.ticks_ms()
     is_recording = True
     
@@ -162,32 +346,58 @@ def start_recording():
 
 def stop_recording():
     """Stop recording."""
-    global is_recording
-    
+    global is_recording, _mode_json
+
     if not is_recording:
         return False
-    
+
     is_recording = False
-    
+    _mode_json = None
+
     # Indicate recording stop
     buzzer_pin.freq(400)
     buzzer_pin.duty_u16(20000)
     time.sleep(0.2)
     buzzer_pin.duty_u16(0)
     
-    print(f"Recording stopped. {len(recorded_melody)} events captured.")
+    print(f"Recording stopped. {_rec_len} events captured.")
+    gc.collect()  # safe point: nothing latency-sensitive is running
     return True
 
+# Playback is triggered often (button 2, /record/play) but creating a
+# fresh Task per press allocates a coroutine frame and Task object each
+# time. One long-lived worker waits on this event instead; trigger sites
+# just set it.
+_play_event = asyncio.Event()
+
+# Set whenever the buzzer is free for the sensor loop; API tone/melody
+# tasks and playback clear it while they own the output, so sensor_loop
+# can await the event instead of polling task state every tick.
+_api_idle = asyncio.Event()
+_api_idle.set()
+
+async def _playback_worker():
+    """Runs playback_recording whenever _play_event is set."""
+    while True:
+        await _play_event.wait()
+        _play_event.clear()
+        _api_idle.clear()
+        try:
+            await playback_recording()
+        finally:
+            _api_idle.set()
+
 async def playback_recording():
     """Play back the recorded melody."""
-    global is_playing_back
-    
-    if not recorded_melody:
+    global is_playing_back, _mode_json
+
+    if not _rec_len:
         print("No recording to play")
         return
-    
+
     is_playing_back = True
-    print(f"Playing back {len(recorded_melody)} events...")
+    _mode_json = None
+    print(f"Playing back {_rec_len} events...")
     
     # Indicate playback start
     buzzer_pin.freq(600)
@@ -196,69 +406,536 @@ async def playback_recording():
     buzzer_pin.duty_u16(0)
     await asyncio.sleep_ms(200)
     
+    # Pre-bound locals keep the per-event work down to array reads and
+    # direct calls, so playback timing stays tight
+    _freq = buzzer_pin.freq
+    _duty = buzzer_pin.duty_u16
+    _sleep = asyncio.sleep_ms
+
     # Play back each recorded event
     last_time = 0
-    for event in recorded_melody:
+    for i in range(_rec_len):
         # Wait for the correct timing
-        time_diff = event["time"] - last_time
-        if time_diff > 0:
-            await asyncio.sleep_ms(time_diff)
-        
+        t = _rec_time[i]
+        dt = t - last_time
+        if dt > 0:
+            await _sleep(dt)
+
         # Play the note
-        if event["freq"] > 0:
-            buzzer_pin.freq(event["freq"])
-            buzzer_pin.duty_u16(event.get("duty", 32768))
+        f = _rec_freq[i]
+        if f:
+            _freq(f)
+            _duty(_rec_duty[i])
         else:
-            buzzer_pin.duty_u16(0)
-        
-        last_time = event["time"]
+            _duty(0)
+
+        last_time = t
     
     # Stop at end
     buzzer_pin.duty_u16(0)
     is_playing_back = False
+    _mode_json = None
     print("Playback complete")
+    gc.collect()  # safe point: playback just finished
 
 # --- Button Handlers ---
 
-async def button_monitor():
-    """Monitor button presses for Record & Play mode."""
-    global last_button1_state, last_button2_state
-    
+async def _button1_presses(flag):
+    """Start/stop recording on button 1 presses."""
     while True:
-        if current_mode == "Record & Play":
-            # Button 1: Start/Stop recording
-            button1_state = button1_pin.value()
-            if button1_state == 0 and last_button1_state == 1:  # Pressed
-                if is_recording:
-                    stop_recording()
-                else:
-                    start_recording()
-            last_button1_state = button1_state
-            
-            # Button 2: Playback
-            button2_state = button2_pin.value()
-            if button2_state == 0 and last_button2_state == 1:  # Pressed
-                if not is_recording and not is_playing_back:
-                    asyncio.create_task(playback_recording())
-            last_button2_state = button2_state
-        
-        await asyncio.sleep_ms(50)
+        await flag.wait()
+        time.sleep_ms(20)  # debounce
+        if current_mode == "Record & Play" and button1_pin.value() == 0:
+            if is_recording:
+                stop_recording()
+            else:
+                start_recording()
+
+async def _button2_presses(flag):
+    """Trigger playback on button 2 presses."""
+    while True:
+        await flag.wait()
+        time.sleep_ms(20)  # debounce
+        if current_mode == "Record & Play" and button2_pin.value() == 0:
+            if not is_recording and not is_playing_back:
+                _play_event.set()
+
+async def button_monitor():
+    """Handle button presses for Record & Play mode via pin IRQs.
+
+    Each press sets a ThreadSafeFlag from the IRQ handler and a waiting
+    coroutine does the real work, so this costs zero scheduler wakeups
+    between presses (the old version polled both pins at 20 Hz forever).
+    ThreadSafeFlag is MicroPython-only, so the flags and IRQ hookup live
+    here rather than at import (the module also loads under CPython).
+    """
+    btn1_flag = asyncio.ThreadSafeFlag()
+    btn2_flag = asyncio.ThreadSafeFlag()
+    button1_pin.irq(trigger=machine.Pin.IRQ_FALLING,
+                    handler=lambda p: btn1_flag.set())
+    button2_pin.irq(trigger=machine.Pin.IRQ_FALLING,
+                    handler=lambda p: btn2_flag.set())
+
+    await asyncio.gather(_button1_presses(btn1_flag),
+                         _button2_presses(btn2_flag))
 
 # --- Web API Handlers ---
 
+# Pre-encoded response fragments: built once at import so handlers never
+# reassemble status lines, headers, or the static HTML shell per request.
+_JSON_200 = b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\nContent-Length: "
+_HTML_200 = b"HTTP/1.0 200 OK\r\nContent-Type: text/html\r\nContent-Length: "
+_400 = b"HTTP/1.0 400 Bad Request\r\nContent-Length: 0\r\n\r\n"
+_404 = b"HTTP/1.0 404 Not Found\r\nContent-Length: 0\r\n\r\n"
+
+_HTML_HEAD = (
+    b"<html>"
+    b"<head><title>Pico Orchestra</title></head>"
+    b"<body style='font-family: Arial; padding: 20px;'>"
+    b"<h1>Pico Light Orchestra</h1>"
+    b"<p><b>Device:</b> "
+)
+_HTML_CONTROLS = (
+    b"<hr>"
+    b"<h3>Controls</h3>"
+    b"<button onclick=\"fetch('/calibrate', {method:'POST'})\">Calibrate</button>"
+    b"<button onclick=\"fetch('/post_mode', {method:'POST', body:JSON.stringify({mode:'Live Play'})})\">Live Play</button>"
+    b"<button onclick=\"fetch('/post_mode', {method:'POST', body:JSON.stringify({mode:'Record & Play'})})\">Record Mode</button>"
+)
+_HTML_TAIL = (
+    b"<script>setTimeout(function(){location.reload()}, 3000)</script>"
+    b"</body></html>"
+)
+
+# Tiny-body parsers: /post_mode and /tone carry a fixed ~30-byte schema,
+# and json.loads builds a whole dict tree for it. Scanning the bytes
+# directly skips that; the handlers keep json.loads as a fallback.
+
+# Accepted mode vocabularies; frozensets give hashed membership checks
+# with no per-request list literal
+_LIVE_MODES = frozenset(("l", "L", "Live Play"))
+_RECORD_MODES = frozenset(("r", "R", "Record & Play"))
+
+def _parse_mode(body, end=None):
+    """Extract the "mode" string field; raises ValueError if absent.
+
+    `end` bounds the scan when body is a _read_body buffer, which may
+    hold stale bytes past the current length on a short read.
+    """
+    if end is None:
+        end = len(body)
+    i = body.find(b'"mode"', 0, end)
+    if i < 0:
+        raise ValueError("no mode field")
+    j = body.find(b'"', i + 6, end)
+    k = body.find(b'"', j + 1, end)
+    if j < 0 or k < 0:
+        raise ValueError("malformed mode field")
+    return bytes(body[j + 1:k]).decode()
+
+def _parse_number(body, key, default, end=None):
+    """Pull a bare numeric field (int or float) out of a tiny JSON body."""
+    if end is None:
+        end = len(body)
+    i = body.find(key, 0, end)
+    if i < 0:
+        return default
+    i = body.find(b":", i, end) + 1
+    while i < end and body[i] in b" \t":
+        i += 1
+    j = i
+    while j < end and body[j] in b"+-0123456789.eE":
+        j += 1
+    s = bytes(body[i:j])
+    if not s:
+        return default
+    if b"." in s or b"e" in s or b"E" in s:
+        return float(s)
+    return int(s)
+
+# Small POST bodies: when Content-Length fits, the body is read with
+# readinto into a right-sized buffer and parsed with bounded scans. The
+# buffer is per request, not shared: _read_body awaits between segments
+# of a split body, so concurrent requests would otherwise interleave
+# into one buffer and parse each other's bytes.
+_have_readinto = True  # cleared on builds whose streams lack readinto
+
+async def _read_body(reader, content_length, pre=b""):
+    """Reads the POST body into a right-sized per-request buffer.
+
+    pre holds body bytes that arrived in the same segment as the headers
+    (see handle_request). Returns (buffer, length); the buffer may be
+    longer than length, so callers must bound their parsing.
+    """
+    global _have_readinto
+    n = content_length
+    have = len(pre)
+    if 0 < n <= 256:
+        if have > n:
+            have = n
+        buf = bytearray(n)
+        mv = memoryview(buf)
+        buf[:have] = pre[:have]
+        try:
+            while have < n and _have_readinto:
+                got = await reader.readinto(mv[have:n])
+                if not got:
+                    break
+                have += got
+        except AttributeError:
+            _have_readinto = False
+        if have < n and not _have_readinto:
+            rest = await reader.read(n - have)
+            buf[have:have + len(rest)] = rest
+            have += len(rest)
+        return buf, have
+    body = bytes(pre)
+    if n > have:
+        # read() returns as soon as any bytes are available, so a body
+        # spanning several TCP segments would come back short and fail
+        # json.loads; readexactly waits out the full Content-Length
+        body += await reader.readexactly(n - have)
+    elif not n:
+        body = await reader.read(200)
+    return body, len(body)
+
+# Shared scratch buffer for response assembly. Headers and payload are
+# copied into this preallocated bytearray and sliced, so the common JSON
+# endpoints allocate no fresh response bytes per request. The stream
+# writer copies data into its own buffer on write(), so reuse is safe.
+_resp_buf = bytearray(1024)
+_resp_mv = memoryview(_resp_buf)
+
+def _fill_resp(header, payload):
+    """Assembles header+payload in the scratch buffer; returns a view.
+
+    The header constants end with "Content-Length: " so the length line
+    is filled in here; clients can then close as soon as the body
+    arrives instead of waiting on our FIN.
+    """
+    tail = b"%d\r\n\r\n" % len(payload)
+    h = len(header)
+    t = h + len(tail)
+    n = t + len(payload)
+    if n > 1024:
+        return header + tail + payload  # oversized: fall back to concat
+    _resp_buf[:h] = header
+    _resp_buf[h:t] = tail
+    _resp_buf[t:n] = payload
+    return _resp_mv[:n]
+
+def _const_resp(header, payload):
+    """Builds a complete, immutable response at import time."""
+    return header + b"%d\r\n\r\n" % len(payload) + payload
+
+# Fixed-body endpoints: the entire response is one constant bytes
+# object, so serving them is a dict lookup plus a single write()
+_RESP_CALIBRATING = _const_resp(_JSON_200, b'{"status": "calibrating"}')
+_RESP_OK = _const_resp(_JSON_200, b'{"status": "ok"}')
+_RESP_ERROR = _const_resp(_JSON_200, b'{"status": "error"}')
+_RESP_PLAYING = _const_resp(_JSON_200, b'{"status": "playing"}')
+_RESP_BUSY = _const_resp(_JSON_200, b'{"status": "busy"}')
+
+# --- Endpoint handlers ---
+# Each takes (reader, content_length, body_pre) — body_pre being any
+# body bytes drained along with the headers — and returns the full response
+# bytes; handle_request dispatches to them through _ROUTES below.
+
+async def _h_health(reader, content_length, body_pre):
+    global _health_tmpl
+    if _health_tmpl is None:
+        _health_tmpl = (
+            b'{"status": "active", "device_id": "%s", "api": "v2.0", '
+            b'"calibrated": %s, "t_ms": %%d}'
+            % (device_id.encode(), b"true" if calibrated else b"false")
+        )
+    # t_ms is the local clock, for conductor sync
+    return _fill_resp(_JSON_200, _health_tmpl % time.ticks_ms())
+
+async def _h_sensor(reader, content_length, body_pre):
+    raw, norm = read_sensor_calibrated()
+    return _fill_resp(_JSON_200, (
+        b'{"raw": %d, "norm": %.3f, "floor": %d, "ceiling": %d, '
+        b'"calibrated": %s}'
+        % (raw, norm, int(ambient_light_floor), int(ambient_light_ceiling),
+           b"true" if calibrated else b"false")
+    ))
+
+async def _h_calibrate(reader, content_length, body_pre):
+    # Trigger calibration
+    asyncio.create_task(async_calibrate())
+    return _RESP_CALIBRATING
+
+async def _h_get_mode(reader, content_length, body_pre):
+    global _mode_json
+    if _mode_json is None:
+        _mode_json = (
+            b'{"mode": "%s", "is_recording": %s, "is_playing": %s, '
+            b'"melody_length": %d}'
+            % (current_mode.encode(),
+               b"true" if is_recording else b"false",
+               b"true" if is_playing_back else b"false",
+               _rec_len)
+        )
+    return _fill_resp(_JSON_200, _mode_json)
+
+async def _h_post_mode(reader, content_length, body_pre):
+    global current_mode, _mode_json, _index_prefix
+    body, n = await _read_body(reader, content_length, body_pre)
+    try:
+        try:
+            mode = _parse_mode(body, n)
+        except ValueError:
+            mode = json.loads(body[:n]).get("mode", "")
+
+        if mode in _LIVE_MODES:
+            current_mode = "Live Play"
+            stop_recording()
+        elif mode in _RECORD_MODES:
+            current_mode = "Record & Play"
+        _mode_json = None
+        _index_prefix = None
+
+        return _fill_resp(_JSON_200, b'{"status": "ok", "mode": "%s"}'
+                          % current_mode.encode())
+    except:
+        return _400
+
+async def _h_record_start(reader, content_length, body_pre):
+    success = start_recording()
+    return _RESP_OK if success else _RESP_ERROR
+
+async def _h_record_stop(reader, content_length, body_pre):
+    success = stop_recording()
+    return _fill_resp(_JSON_200, b'{"status": "%s", "events": %d}'
+                      % (b"ok" if success else b"error", _rec_len))
+
+async def _h_record_play(reader, content_length, body_pre):
+    if not is_recording and not is_playing_back:
+        _play_event.set()
+        return _RESP_PLAYING
+    return _RESP_BUSY
+
+async def _h_melody_post(reader, content_length, body_pre):
+    global api_note_task
+    # Whole-song batch from the conductor: queue the notes and time
+    # them locally so playback doesn't depend on per-note round trips.
+    body, n = await _read_body(reader, content_length, body_pre)
+    try:
+        data = json.loads(body[:n])
+        notes = data.get("notes", [])
+        gap_ms = int(data.get("gap_ms", 0))
+
+        if api_note_task and not api_note_task.done():
+            api_note_task.cancel()
+
+        api_note_task = asyncio.create_task(play_melody_queue(notes, gap_ms))
+
+        return _fill_resp(_JSON_200, b'{"status": "ok", "queued": %d}'
+                          % len(notes))
+    except:
+        return _400
+
+async def _h_melody_get(reader, content_length, body_pre):
+    # Build the JSON straight from the typed arrays instead of
+    # materializing per-event dicts
+    n = _rec_len if _rec_len < 100 else 100  # Limit size
+    buf = bytearray(b'{"melody":[')
+    for i in range(n):
+        if i:
+            buf += b","
+        buf += ('{"time":%d,"freq":%d,"duty":%d}'
+                % (_rec_time[i], _rec_freq[i], _rec_duty[i])).encode()
+    duration = _rec_time[_rec_len - 1] if _rec_len else 0
+    buf += ('],"total_events":%d,"duration_ms":%d}'
+            % (_rec_len, duration)).encode()
+    return _fill_resp(_JSON_200, buf)
+
+async def _h_tone(reader, content_length, body_pre):
+    global api_note_task
+    body, n = await _read_body(reader, content_length, body_pre)
+    try:
+        if body.find(b'"freq"', 0, n) >= 0:
+            # Fast path: scan the fixed schema directly
+            freq = int(_parse_number(body, b'"freq"', 440, n))
+            ms = int(_parse_number(body, b'"ms"', 100, n))
+            duty = float(_parse_number(body, b'"duty"', 0.5, n))
+            play_at = _parse_number(body, b'"play_at"', None, n)
+        else:
+            data = json.loads(body[:n])
+            freq = int(data.get("freq", 440))
+            ms = int(data.get("ms", 100))
+            duty = float(data.get("duty", 0.5))
+            play_at = data.get("play_at")
+
+        if api_note_task and not api_note_task.done():
+            api_note_task.cancel()
+
+        api_note_task = asyncio.create_task(play_api_tone(freq, ms, duty, play_at))
+
+        return _RESP_OK
+    except:
+        return _400
+
+async def _h_index(reader, content_length, body_pre):
+    global _index_prefix
+    raw, norm = read_sensor_calibrated()
+
+    # Everything up to the live light level only changes on a mode
+    # switch or recalibration, so it is cached as one bytes object and
+    # rebuilt when those handlers drop it; per request only the dynamic
+    # values get encoded
+    if _index_prefix is None:
+        _index_prefix = (
+            _HTML_HEAD + device_id.encode()
+            + b"</p><p><b>Mode:</b> " + current_mode.encode()
+            + b"</p><p><b>Calibrated:</b> "
+            + (b"Yes" if calibrated else b"No")
+            + b"</p><hr><p><b>Light Level:</b> "
+        )
+    buf = bytearray(_index_prefix)
+    buf += str(raw).encode()
+    buf += b"</p><p><b>Normalized:</b> "
+    buf += str(int(norm * 100)).encode()
+    buf += b"%</p><p><b>Range:</b> "
+    buf += str(ambient_light_floor).encode()
+    buf += b" - "
+    buf += str(ambient_light_ceiling).encode()
+    buf += b"</p>"
+    buf += _HTML_CONTROLS
+
+    if current_mode == "Record & Play":
+        buf += b"<p><b>Recording:</b> "
+        buf += b"True" if is_recording else b"False"
+        buf += b"</p>"
+
+    if _rec_len:
+        buf += b"<p><b>Melody Length:</b> "
+        buf += str(_rec_len).encode()
+        buf += b" events</p>"
+
+    buf += _HTML_TAIL
+    return _fill_resp(_HTML_200, buf)
+
+async def _h_get_range(reader, content_length, body_pre):
+    global _range_json
+    if _range_json is None:
+        _range_json = (
+            b'{"floor": %d, "ceiling": %d, "range": %d}'
+            % (int(ambient_light_floor), int(ambient_light_ceiling),
+               int(ambient_light_ceiling - ambient_light_floor))
+        )
+    return _fill_resp(_JSON_200, _range_json)
+
+_ROUTES = {
+    ("GET", "/"): _h_index,
+    ("GET", "/health"): _h_health,
+    ("GET", "/sensor"): _h_sensor,
+    ("GET", "/get_mode"): _h_get_mode,
+    ("GET", "/get_range"): _h_get_range,
+    ("GET", "/melody"): _h_melody_get,
+    ("POST", "/calibrate"): _h_calibrate,
+    ("POST", "/post_mode"): _h_post_mode,
+    ("POST", "/record/start"): _h_record_start,
+    ("POST", "/record/stop"): _h_record_stop,
+    ("POST", "/record/play"): _h_record_play,
+    ("POST", "/melody"): _h_melody_post,
+    ("POST", "/tone"): _h_tone,
+}
+
+# Size of the per-connection header scratch buffer in handle_request.
+# Per connection, not module-level: the drain awaits readinto between
+# segments, so concurrent connections sharing one buffer would corrupt
+# each other's header scans.
+_HDR_BUF_SIZE = 1024
+
+# Cached endpoint payloads; None means stale, rebuilt on next hit.
+# /get_mode is polled every 3 s by the auto-reloading page, so rebuilding
+# only when mode/recording/playback/melody state mutates skips a
+# json.dumps per request. /health keeps a %-template because t_ms must
+# stay fresh per request; its static part is invalidated by calibration.
+_mode_json = None
+_range_json = None
+_health_tmpl = None
+_index_prefix = None
+
+
 async def handle_request(reader, writer):
     """Handle HTTP requests with calibration endpoints."""
-    global current_mode, sensor_range, api_note_task
-    
+    global _have_readinto
+
     try:
         request_line = await reader.readline()
-        
-        # Skip headers
-        while True:
-            line = await reader.readline()
-            if line == b"\r\n":
-                break
-        
+
+        # Drain all headers into a per-connection buffer with readinto
+        # and scan with find — one resume per TCP segment instead of a
+        # readline per header line — remembering Content-Length so body
+        # reads can be sized exactly instead of waiting out a
+        # fixed-size read. readinto can pull in body bytes that share
+        # the final segment; those are handed on as body_pre.
+        content_length = 0
+        body_pre = b""
+        if _have_readinto:
+            try:
+                hdr_buf = bytearray(_HDR_BUF_SIZE)
+                hdr_mv = memoryview(hdr_buf)
+                end = 0
+                sep = -1
+                body_at = 0
+                while end < _HDR_BUF_SIZE:
+                    got = await reader.readinto(hdr_mv[end:])
+                    if not got:
+                        break
+                    end += got
+                    if end >= 2 and hdr_buf[0] == 0x0D and hdr_buf[1] == 0x0A:
+                        # Zero header fields: only the blank line follows
+                        # the request line, so there is no \r\n\r\n to find
+                        sep = 0
+                        body_at = 2
+                        break
+                    sep = hdr_buf.find(b"\r\n\r\n", 0, end)
+                    if sep >= 0:
+                        body_at = sep + 4
+                        break
+                hi = sep if sep >= 0 else end
+                i = hdr_buf.find(b"Content-Length:", 0, hi)
+                if i < 0:
+                    i = hdr_buf.find(b"content-length:", 0, hi)
+                if i >= 0:
+                    j = hdr_buf.find(b"\r\n", i, end)
+                    if j > i:
+                        try:
+                            content_length = int(
+                                hdr_buf[i + 15:j].decode())
+                        except ValueError:
+                            pass
+                if sep >= 0:
+                    body_pre = hdr_mv[body_at:end]
+                elif end:
+                    # Header block overflowed the buffer: finish the
+                    # drain line by line (rare; long browser headers)
+                    while True:
+                        line = await reader.readline()
+                        if not line or line == b"\r\n":
+                            break
+                        if line[:15].lower() == b"content-length:":
+                            try:
+                                content_length = int(line[15:].decode())
+                            except ValueError:
+                                pass
+            except AttributeError:
+                _have_readinto = False  # CPython streams lack readinto
+        if not _have_readinto:
+            while True:
+                line = await reader.readline()
+                if not line or line == b"\r\n":
+                    break
+                if line[:15].lower() == b"content-length:":
+                    try:
+                        content_length = int(line[15:].decode())
+                    except ValueError:
+                        pass
+
         request = request_line.decode().strip()
         if not request:
             writer.close()
@@ -272,180 +949,110 @@ async def handle_request(reader, writer):
             return
             
         method, path = parts[0], parts[1]
-        print(f"{method} {path}")
-        
-        # Route endpoints
-        if path == "/health":
-            response = json.dumps({
-                "status": "active",
-                "device_id": device_id,
-                "api": "v2.0",
-                "calibrated": calibrated
-            })
-            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\n\r\n")
-            writer.write(response.encode())
-            
-        elif path == "/sensor":
-            raw, norm = read_sensor_calibrated()
-            response = json.dumps({
-                "raw": raw,
-                "norm": round(norm, 3),
-                "floor": ambient_light_floor,
-                "ceiling": ambient_light_ceiling,
-                "calibrated": calibrated
-            })
-            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\n\r\n")
-            writer.write(response.encode())
-            
-        elif path == "/calibrate" and method == "POST":
-            # Trigger calibration
-            asyncio.create_task(async_calibrate())
-            response = json.dumps({"status": "calibrating"})
-            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\n\r\n")
-            writer.write(response.encode())
-            
-        elif path == "/get_mode":
-            response = json.dumps({
-                "mode": current_mode,
-                "is_recording": is_recording,
-                "is_playing": is_playing_back,
-                "melody_length": len(recorded_melody)
-            })
-            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\n\r\n")
-            writer.write(response.encode())
-            
-        elif path == "/post_mode" and method == "POST":
-            body = await reader.read(200)
-            try:
-                data = json.loads(body)
-                mode = data.get("mode", "")
-                
-                if mode in ["l", "L", "Live Play"]:
-                    current_mode = "Live Play"
-                    stop_recording()
-                elif mode in ["r", "R", "Record & Play"]:
-                    current_mode = "Record & Play"
-                
-                response = json.dumps({"status": "ok", "mode": current_mode})
-                writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\n\r\n")
-                writer.write(response.encode())
-            except:
-                writer.write(b"HTTP/1.0 400 Bad Request\r\n\r\n")
+        if DEBUG:
+            print(f"{method} {path}")
         
-        elif path == "/record/start" and method == "POST":
-            success = start_recording()
-            response = json.dumps({"status": "ok" if success else "error"})
-            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\n\r\n")
-            writer.write(response.encode())
-            
-        elif path == "/record/stop" and method == "POST":
-            success = stop_recording()
-            response = json.dumps({
-                "status": "ok" if success else "error",
-                "events": len(recorded_melody)
-            })
-            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\n\r\n")
-            writer.write(response.encode())
-            
-        elif path == "/record/play" and method == "POST":
-            if not is_recording and not is_playing_back:
-                asyncio.create_task(playback_recording())
-                response = json.dumps({"status": "playing"})
-            else:
-                response = json.dumps({"status": "busy"})
-            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\n\r\n")
-            writer.write(response.encode())
-            
-        elif path == "/melody":
-            response = json.dumps({
-                "melody": recorded_melody[:100],  # Limit size
-                "total_events": len(recorded_melody),
-                "duration_ms": recorded_melody[-1]["time"] if recorded_melody else 0
-            })
-            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\n\r\n")
-            writer.write(response.encode())
-            
-        elif method == "POST" and path == "/tone":
-            body = await reader.read(200)
-            try:
-                data = json.loads(body)
-                freq = int(data.get("freq", 440))
-                ms = int(data.get("ms", 100))
-                duty = float(data.get("duty", 0.5))
-                
-                if api_note_task and not api_note_task.done():
-                    api_note_task.cancel()
-                
-                api_note_task = asyncio.create_task(play_api_tone(freq, ms, duty))
-                
-                response = json.dumps({"status": "ok"})
-                writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\n\r\n")
-                writer.write(response.encode())
-            except:
-                writer.write(b"HTTP/1.0 400 Bad Request\r\n\r\n")
-                
-        elif path == "/":
-            raw, norm = read_sensor_calibrated()
-            
-            # Build HTML with simpler string concatenation for MicroPython compatibility
-            calib_status = "Yes" if calibrated else "No"
-            norm_percent = int(norm * 100)
-            
-            html = "<html>"
-            html += "<head><title>Pico Orchestra</title></head>"
-            html += "<body style='font-family: Arial; padding: 20px;'>"
-            html += "<h1>Pico Light Orchestra</h1>"
-            html += "<p><b>Device:</b> " + str(device_id) + "</p>"
-            html += "<p><b>Mode:</b> " + str(current_mode) + "</p>"
-            html += "<p><b>Calibrated:</b> " + calib_status + "</p>"
-            html += "<hr>"
-            html += "<p><b>Light Level:</b> " + str(raw) + "</p>"
-            html += "<p><b>Normalized:</b> " + str(norm_percent) + "%</p>"
-            html += "<p><b>Range:</b> " + str(ambient_light_floor) + " - " + str(ambient_light_ceiling) + "</p>"
-            html += "<hr>"
-            html += "<h3>Controls</h3>"
-            html += "<button onclick=\"fetch('/calibrate', {method:'POST'})\">Calibrate</button>"
-            html += "<button onclick=\"fetch('/post_mode', {method:'POST', body:JSON.stringify({mode:'Live Play'})})\">Live Play</button>"
-            html += "<button onclick=\"fetch('/post_mode', {method:'POST', body:JSON.stringify({mode:'Record & Play'})})\">Record Mode</button>"
-            
-            if current_mode == "Record & Play":
-                html += "<p><b>Recording:</b> " + str(is_recording) + "</p>"
-            
-            if recorded_melody:
-                html += "<p><b>Melody Length:</b> " + str(len(recorded_melody)) + " events</p>"
-            
-            html += "<script>setTimeout(function(){location.reload()}, 3000)</script>"
-            html += "</body></html>"
-            
-            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: text/html\r\n\r\n")
-            writer.write(html.encode())
-        
-        elif path == "/get_range":
-            response = json.dumps({
-                "floor": ambient_light_floor,
-                "ceiling": ambient_light_ceiling,
-                "range": ambient_light_ceiling - ambient_light_floor
-            })
-            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\n\r\n")
-            writer.write(response.encode())
-            
-        else:
-            writer.write(b"HTTP/1.0 404 Not Found\r\n\r\n")
-            
+        # One dict lookup instead of walking an elif ladder of string
+        # compares; each handler returns the fully assembled response
+        handler = _ROUTES.get((method, path))
+        out = (_404 if handler is None
+               else await handler(reader, content_length, body_pre))
+
+        # One write + drain per response: each uasyncio write can turn
+        # into its own TCP segment, so batching keeps responses to a
+        # single packet where they fit
+        writer.write(out)
+
     except Exception as e:
         print(f"Request error: {e}")
     finally:
         await writer.drain()
         writer.close()
         await writer.wait_closed()
+        # Collect here, with the response on the wire, rather than letting
+        # an automatic GC pause land mid-playback or mid-sample
+        gc.collect()
+
+async def serve_http():
+    """Accept loop for the web API on a hand-tuned listen socket.
+
+    asyncio.start_server leaves Nagle's algorithm on, which can hold the
+    small JSON responses back waiting to coalesce segments. Owning the
+    socket lets us set SO_REUSEADDR on the listener (instant rebind
+    after a soft reset) and TCP_NODELAY on every accepted connection.
+    Same non-blocking poll pattern as udp_tone_listener.
+    """
+    lsock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    lsock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    lsock.bind(("0.0.0.0", 80))
+    lsock.listen(4)
+    lsock.setblocking(False)
+
+    # Constants are missing from some ports; the raw values are standard
+    ipproto_tcp = getattr(socket, "IPPROTO_TCP", 6)
+    tcp_nodelay = getattr(socket, "TCP_NODELAY", 1)
+
+    while True:
+        try:
+            conn, addr = lsock.accept()
+        except OSError:
+            # Nothing pending
+            await asyncio.sleep_ms(5)
+            continue
+
+        conn.setblocking(False)
+        try:
+            conn.setsockopt(ipproto_tcp, tcp_nodelay, 1)
+        except OSError:
+            pass  # port rejects TCP options; Nagle stays on
+
+        # MicroPython's StreamReader/StreamWriter are both the Stream
+        # type and wrap a raw socket directly
+        reader = asyncio.StreamReader(conn)
+        writer = asyncio.StreamWriter(conn, {})
+        asyncio.create_task(handle_request(reader, writer))
 
 async def async_calibrate():
     """Async wrapper for calibration."""
     calibrate_sensor()
 
-async def play_api_tone(freq, ms, duty):
-    """Play tone from API."""
+async def play_melody_queue(notes, gap_ms):
+    """Play a batch of queued notes with local timing."""
+    _api_idle.clear()
     try:
+        for note in notes:
+            freq = int(note.get("freq", 0))
+            ms = int(note.get("ms", 100))
+
+            if freq > 0:
+                buzzer_pin.freq(freq)
+                buzzer_pin.duty_u16(32768)
+            else:
+                buzzer_pin.duty_u16(0)
+
+            await asyncio.sleep_ms(ms)
+            stop_tone()
+
+            if gap_ms > 0:
+                await asyncio.sleep_ms(gap_ms)
+    except asyncio.CancelledError:
+        stop_tone()
+    finally:
+        # A cancelled task may finish after its replacement has already
+        # claimed the buzzer; only release if we are still the owner
+        if api_note_task is asyncio.current_task():
+            _api_idle.set()
+
+async def play_api_tone(freq, ms, duty, play_at=None):
+    """Play tone from API, optionally holding until a local-clock deadline."""
+    _api_idle.clear()
+    try:
+        if play_at is not None:
+            # Conductor scheduled this note against our clock; wait it out so
+            # every Pico starts together regardless of network jitter.
+            delay = time.ticks_diff(int(play_at), time.ticks_ms())
+            if 0 < delay < 1000:
+                await asyncio.sleep_ms(delay)
         if freq > 0:
             buzzer_pin.freq(freq)
             buzzer_pin.duty_u16(int(duty * 65535))
@@ -453,87 +1060,164 @@ async def play_api_tone(freq, ms, duty):
             stop_tone()
     except asyncio.CancelledError:
         stop_tone()
+    finally:
+        # A cancelled task may finish after its replacement has already
+        # claimed the buzzer; only release if we are still the owner
+        if api_note_task is asyncio.current_task():
+            _api_idle.set()
+
+async def udp_tone_listener():
+    """Listen for packed UDP tone packets from the conductor.
+
+    UDP skips the TCP handshake and HTTP parsing, so a tone costs the
+    Pico well under a millisecond to receive. Packets are fire-and-forget;
+    a dropped tone is better than a late one.
+    """
+    global api_note_task
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("0.0.0.0", UDP_TONE_PORT))
+    sock.setblocking(False)
+
+    # Best-effort join of the orchestra multicast group so one conductor
+    # datagram reaches every Pico at once; not all MicroPython ports
+    # expose IGMP membership, and unicast still works without it.
+    try:
+        mreq = bytes(int(x) for x in MCAST_GROUP.split(".")) + b"\x00\x00\x00\x00"
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+    except (AttributeError, OSError):
+        pass
+
+    while True:
+        try:
+            pkt = sock.recv(6)
+        except OSError:
+            # Nothing waiting
+            await asyncio.sleep_ms(5)
+            continue
+
+        if len(pkt) >= 6:
+            freq, ms, duty_x1000 = struct.unpack("<HHH", pkt)
+
+            if api_note_task and not api_note_task.done():
+                api_note_task.cancel()
+
+            api_note_task = asyncio.create_task(
+                play_api_tone(freq, ms, duty_x1000 / 1000)
+            )
 
 # --- Main Sensor Loop ---
 
+# Note-change debounce state for sensor_loop. Module-level rather than
+# loop locals so start_recording can reset them between sessions.
+_last_freq = 0
+_last_change_time = -1000
+
 async def sensor_loop():
     """Main sensor loop for Live Play and Recording."""
-    global recorded_melody
-    
-    last_note_index = -1
-    last_freq = 0
-    
+    global _rec_len, _mode_json, _last_freq, _last_change_time
+
+    # Pre-bound locals: every dotted global below costs two dict lookups
+    # per access in MicroPython, so hoisting them out of the 40 Hz loop
+    # removes a couple hundred lookups per second of pure overhead
+    _sense = _sense_burst if _adc_burst else _sense_plain
+    _freq = buzzer_pin.freq
+    _duty = buzzer_pin.duty_u16
+    _ms = time.ticks_ms
+    _diff = time.ticks_diff
+    _sleep = asyncio.sleep_ms
+    _stop = stop_tone
+    _rt = _rec_time
+    _rf = _rec_freq
+    _rd = _rec_duty
+    _max = MAX_EVENTS
+
     while True:
         try:
-            # Skip if API is playing or we're in playback
-            if (api_note_task and not api_note_task.done()) or is_playing_back:
-                await asyncio.sleep_ms(50)
+            # Block while the API or playback owns the buzzer; the tasks
+            # clear/set the event, so this costs nothing when idle and
+            # wakes exactly when the buzzer is handed back
+            if not _api_idle.is_set():
+                await _api_idle.wait()
                 continue
-            
-            raw, norm = read_sensor_calibrated()
-            
+            # The event has no single owner: a finishing tone task can
+            # set it while playback still drives the buzzer (and vice
+            # versa), so re-verify ownership before touching PWM and
+            # hand the wait back until the real owner releases it
+            if is_playing_back or (api_note_task and not api_note_task.done()):
+                _api_idle.clear()
+                continue
+
+            # One fused native call does the ADC read, clamp/scale and
+            # LUT lookup; _cal_floor/_cal_span are maintained by
+            # calibrate_sensor. 0 means silence.
+            freq = _sense(_cal_floor, _cal_span)
+
             if current_mode == "Live Play":
                 # Live play with calibrated range
-                if norm > 0.05:  # Threshold to avoid noise
-                    note_index = light_to_note_index(norm)
-                    
+                if freq:
                     # Only change note if it's different (reduces jitter)
-                    if note_index != last_note_index:
-                        freq = NOTES[note_index]
-                        buzzer_pin.freq(freq)
-                        buzzer_pin.duty_u16(32768)
-                        last_note_index = note_index
-                else:
-                    stop_tone()
-                    last_note_index = -1
-                    
+                    if freq != _last_freq:
+                        _freq(freq)
+                        _duty(32768)
+                        _last_freq = freq
+                elif _last_freq:
+                    # Write the duty register once per silence transition,
+                    # not every tick the room stays dark
+                    _stop()
+                    _last_freq = 0
+
             elif current_mode == "Record & Play" and is_recording:
                 # Record mode - capture events with timing
-                current_time = time.ticks_diff(time.ticks_ms(), recording_start_time)
-                
-                if norm > 0.05:
-                    note_index = light_to_note_index(norm)
-                    freq = NOTES[note_index]
-                    
-                    # Only record if note changed significantly
-                    if abs(freq - last_freq) > 10:
-                        recorded_melody.append({
-                            "time": current_time,
-                            "freq": freq,
-                            "norm": norm,
-                            "duty": 32768
-                        })
-                        
+                current_time = _diff(_ms(), recording_start_time)
+
+                if freq:
+                    # Only record if the note changed (NOTES entries are
+                    # unique) and it has held for 30 ms — threshold noise at
+                    # note boundaries otherwise toggles events every sample
+                    if (freq != _last_freq
+                            and current_time - _last_change_time > 30):
+                        _last_change_time = current_time
+                        if _rec_len < _max:
+                            _rt[_rec_len] = current_time
+                            _rf[_rec_len] = freq
+                            _rd[_rec_len] = 32768
+                            _rec_len += 1
+                            _mode_json = None
+
                         # Also play the note
-                        buzzer_pin.freq(freq)
-                        buzzer_pin.duty_u16(32768)
-                        last_freq = freq
+                        _freq(freq)
+                        _duty(32768)
+                        _last_freq = freq
                 else:
-                    # Record silence if it's a change
-                    if last_freq > 0:
-                        recorded_melody.append({
-                            "time": current_time,
-                            "freq": 0,
-                            "norm": 0,
-                            "duty": 0
-                        })
-                    stop_tone()
-                    last_freq = 0
-                
+                    # Record silence if it's a change that held for 30 ms
+                    if (_last_freq
+                            and current_time - _last_change_time > 30):
+                        _last_change_time = current_time
+                        if _rec_len < _max:
+                            _rt[_rec_len] = current_time
+                            _rf[_rec_len] = 0
+                            _rd[_rec_len] = 0
+                            _rec_len += 1
+                            _mode_json = None
+                        _stop()
+                        _last_freq = 0
+
                 # Auto-stop after 30 seconds
                 if current_time > 30000:
                     stop_recording()
-            
-            await asyncio.sleep_ms(25)  # 40Hz sampling rate
-            
+
+            await _sleep(25)  # 40Hz sampling rate
+
         except Exception as e:
             print(f"Sensor loop error: {e}")
-            await asyncio.sleep_ms(1000)
+            await _sleep(1000)
 
 # --- WiFi Connection ---
 
-def connect_to_wifi(wifi_config="wifi_config.json"):
-    """Connect to WiFi network."""
+async def connect_to_wifi(wifi_config="wifi_config.json"):
+    """Connect to WiFi network without blocking the event loop."""
     try:
         with open(wifi_config, "r") as f:
             data = json.load(f)
@@ -547,12 +1231,14 @@ def connect_to_wifi(wifi_config="wifi_config.json"):
     print(f"Connecting to {data['ssid']}...")
     wlan.connect(data["ssid"], data["password"])
     
-    max_wait = 15
+    # Poll at 200 ms instead of a blocking 1 s time.sleep: association
+    # usually lands mid-second, and the other tasks keep running
+    max_wait = 75
     while max_wait > 0:
         if wlan.status() == 3:
             break
         max_wait -= 1
-        time.sleep(1)
+        await asyncio.sleep_ms(200)
     
     if wlan.status() != 3:
         print(f"Connection failed")
@@ -564,28 +1250,55 @@ def connect_to_wifi(wifi_config="wifi_config.json"):
 
 # --- Main Entry ---
 
+async def _mem_watchdog():
+    """Logs free heap every 30 s so leaks show up without forcing GC."""
+    while True:
+        await asyncio.sleep(30)
+        print(f"mem_free: {gc.mem_free()}")
+
 async def main():
     """Main program."""
     global ip_address
     
     print("\n=== Pico Light Orchestra v2.0 ===")
-    
+
+    # GC runs mainly at the explicit safe points (end of request, end of
+    # recording/playback); the raised threshold keeps automatic
+    # collections rare so their pauses seldom land mid-sample or
+    # mid-playback, while still covering offline runs where no safe
+    # point is ever reached. Disabling GC outright would leave those
+    # runs to exhaust the heap.
+    try:
+        gc.threshold(gc.mem_free() // 4 + gc.mem_alloc())
+    except AttributeError:
+        pass  # CPython: no threshold/mem_* API
+
+    # Switch the ADC to free-running FIFO sampling before calibrating so
+    # the calibration scan gets the hardware path too
+    _setup_adc_burst()
+
     # Initial calibration
     print("\nCalibrating sensor...")
     calibrate_sensor()
-    
+
+    # Start the core tasks first so live play and the buttons work
+    # during the (up to 15 s) WiFi association window
+    tasks = [asyncio.create_task(sensor_loop()),
+             asyncio.create_task(button_monitor()),
+             asyncio.create_task(_playback_worker())]
+    if hasattr(gc, "mem_free"):
+        tasks.append(asyncio.create_task(_mem_watchdog()))
+
     # Connect WiFi
-    ip_address = connect_to_wifi()
+    ip_address = await connect_to_wifi()
     if not ip_address:
         print("Running offline")
         # Could still run with buttons
-    
-    # Start tasks
-    tasks = [sensor_loop(), button_monitor()]
-    
+
     if ip_address:
         print(f"Web server: http://{ip_address}/")
-        await asyncio.start_server(handle_request, "0.0.0.0", 80)
+        tasks.append(asyncio.create_task(serve_http()))
+        tasks.append(asyncio.create_task(udp_tone_listener()))
     
     await asyncio.gather(*tasks)
 
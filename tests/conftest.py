@@ -0,0 +1,88 @@
+"""Shared pytest setup for the function tests.
+
+Installs fakes for the MicroPython-only modules before collection so
+main.py can be imported under CPython, then imports main and conductor
+exactly once. This runs once per process, which under pytest-xdist
+means exactly once per worker; tests reach the modules through the
+session fixtures below instead of re-running `import main` per test.
+"""
+import operator
+import sys
+import os
+from unittest.mock import Mock, patch
+
+import pytest
+
+# Add src directory to Python path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# Mock the MicroPython-only modules before any test imports main.
+# Plain Mock, not MagicMock: nothing here needs magic methods, and Mock
+# skips pre-registering the magic-method children on every attribute.
+sys.modules['machine'] = Mock()
+sys.modules['network'] = Mock()
+sys.modules['ubinascii'] = Mock()
+sys.modules['requests'] = Mock()
+
+# Mock MicroPython-specific time functions. ticks_diff is plain
+# subtraction rather than a Mock: calibrate_sensor calls it every loop
+# iteration, and nothing asserts on its calls, so routing it through
+# Mock dispatch plus a side-effect lambda would be pure overhead.
+import time
+time.ticks_ms = Mock()
+time.sleep_ms = Mock()
+time.ticks_diff = operator.sub
+
+import main as _main
+import conductor as _conductor
+
+
+@pytest.fixture(scope="session")
+def main_mod():
+    """The main module, imported once per worker."""
+    return _main
+
+
+@pytest.fixture(scope="session")
+def conductor_mod():
+    """The conductor module, imported once per worker."""
+    return _conductor
+
+
+# Shared pin mocks: built once at import and handed to patch() as the
+# replacement object, so no Mock is constructed per test. The fixtures
+# reset state instead.
+_buzzer = Mock()
+_sensor = Mock()
+
+
+@pytest.fixture
+def buzzer_mock():
+    """main.buzzer_pin replaced by the shared Mock, reset per test."""
+    _buzzer.reset_mock()
+    _buzzer.duty_u16.side_effect = None
+    with patch('main.buzzer_pin', _buzzer):
+        yield _buzzer
+
+
+@pytest.fixture
+def sensor_mock():
+    """main.photo_sensor_pin replaced by the shared Mock, reset per test."""
+    _sensor.reset_mock()
+    _sensor.read_u16.side_effect = None
+    with patch('main.photo_sensor_pin', _sensor):
+        yield _sensor
+
+
+@pytest.fixture
+def mock_post():
+    """conductor.SESSION.post patched with a plain Mock."""
+    with patch('conductor.SESSION.post', new_callable=Mock) as m:
+        yield m
+
+
+@pytest.fixture
+def mock_get():
+    """conductor.SESSION.get patched with a plain Mock."""
+    with patch('conductor.SESSION.get', new_callable=Mock) as m:
+        yield m
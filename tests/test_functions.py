@@ -2,478 +2,304 @@
 Function-level tests for the Pico Light Orchestra project
 These tests individual functions without requiring hardware
 """
-import sys
 import os
-import unittest
-from unittest.mock import Mock, patch, MagicMock
-import asyncio
+import sys
+import json
+import logging
+from types import SimpleNamespace
 
-# Add src directory to Python path so we can import our modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import pytest
+from unittest.mock import patch
 
-# Mock the machine module before importing main
-sys.modules['machine'] = MagicMock()
-sys.modules['network'] = MagicMock()
-sys.modules['ubinascii'] = MagicMock()
-sys.modules['requests'] = MagicMock()
+# Banner output goes through a handler-less logger: records are dropped
+# inside logging instead of hitting stdout with a syscall per line, and
+# the %-style arguments below are only formatted when a handler wants
+# them. Set TEST_VERBOSE=1 to see the banners while debugging.
+log = logging.getLogger(__name__)
+if os.environ.get("TEST_VERBOSE"):
+    logging.basicConfig(level=logging.DEBUG)
 
-# Mock MicroPython-specific time functions
-import time
-time.ticks_ms = MagicMock()
-time.sleep_ms = MagicMock()
-time.ticks_diff = MagicMock()
+# conftest installs the fakes for the MicroPython-only modules and
+# imports main/conductor once per process; importing it here keeps
+# `python tests/test_functions.py` working outside pytest collection
+import conftest
 
 # Import functions we want to test
+import main
+import conductor
 from main import light_to_note_index, stop_tone, read_sensor_calibrated, calibrate_sensor
 from conductor import play_note_on_all_picos, get_pico_health, get_sensor_data, get_device_mode
 
 
-class TestLightToNoteIndexFunction(unittest.TestCase):
-    """Test the light_to_note_index function from main.py"""
-    
-    def setUp(self):
-        """Set up test fixtures"""
-        # Mock the global sensor_range variable
-        import main
-        self.original_sensor_range = getattr(main, 'sensor_range', 100)
-        main.sensor_range = 100
-    
-    def tearDown(self):
-        """Clean up after tests"""
-        import main
-        main.sensor_range = self.original_sensor_range
-    
-    def test_basic_mapping(self):
-        """Test basic light to note index mapping"""
-        print("\n" + "="*80)
-        print("TEST: test_basic_mapping")
-        print("FUNCTION: light_to_note_index(norm_value, sensitivity=None)")
-        print("PURPOSE: Maps normalized light values (0-1) to musical note indices (0-11)")
-        print("LOCATION: src/main.py, line 118")
-        print("METHOD: Direct function call with middle value (0.5), verify result in valid range")
-        
-        # Test middle value should map to middle note
-        result = light_to_note_index(0.5)
-        self.assertGreaterEqual(result, 0)
-        self.assertLessEqual(result, 11)  # NOTES array has 12 elements (0-11)
-        
-        print(f"RESULT: PASS - Input 0.5 mapped to note index {result} (valid range: 0-11)")
-        print("="*80)
-    
-    def test_edge_cases(self):
-        """Test edge cases for light to note mapping"""
-        print("\n" + "="*80)
-        print("TEST: test_edge_cases")
-        print("FUNCTION: light_to_note_index(norm_value, sensitivity=None)")
-        print("PURPOSE: Maps normalized light values (0-1) to musical note indices (0-11)")
-        print("LOCATION: src/main.py, line 118")
-        print("METHOD: Test minimum (0.0) and maximum (1.0) input values")
-        
-        # Test minimum input (0.0)
-        result_min = light_to_note_index(0.0)
-        self.assertEqual(result_min, 0)
-        
-        # Test maximum input (1.0)
-        result_max = light_to_note_index(1.0)
-        self.assertEqual(result_max, 11)  # Last note index
-        
-        print(f"RESULT: PASS - Min input 0.0 → index {result_min}, Max input 1.0 → index {result_max}")
-        print("="*80)
-    
-    def test_sensitivity_adjustment(self):
-        """Test sensitivity parameter affects mapping"""
-        print("\n" + "="*80)
-        print("TEST: test_sensitivity_adjustment")
-        print("FUNCTION: light_to_note_index(norm_value, sensitivity=None)")
-        print("PURPOSE: Maps normalized light values (0-1) to musical note indices (0-11)")
-        print("LOCATION: src/main.py, line 118")
-        print("METHOD: Test with different sensitivity values (0.1 vs 0.9) on same input")
-        
-        # Test with different sensitivity values
-        result_low_sens = light_to_note_index(0.5, sensitivity=0.1)
-        result_high_sens = light_to_note_index(0.5, sensitivity=0.9)
-        
-        # Results should be different due to sensitivity curve
-        self.assertNotEqual(result_low_sens, result_high_sens)
-        
-        print(f"RESULT: PASS - Low sens (0.1) → index {result_low_sens}, High sens (0.9) → index {result_high_sens}")
-        print("="*80)
-    
-    def test_clamping(self):
-        """Test that results are properly clamped to valid range"""
-        print("\n" + "="*80)
-        print("TEST: test_clamping")
-        print("FUNCTION: light_to_note_index(norm_value, sensitivity=None)")
-        print("PURPOSE: Maps normalized light values (0-1) to musical note indices (0-11)")
-        print("LOCATION: src/main.py, line 118")
-        print("METHOD: Test extreme values (-1.0, 2.0) to verify clamping to valid range")
-        
-        # Test extreme values
-        result_negative = light_to_note_index(-1.0)
-        result_high = light_to_note_index(2.0)
-        
-        self.assertEqual(result_negative, 0)
-        self.assertEqual(result_high, 11)
-        
-        print(f"RESULT: PASS - Negative input (-1.0) clamped to {result_negative}, High input (2.0) clamped to {result_high}")
-        print("="*80)
-
-
-class TestStopToneFunction(unittest.TestCase):
-    """Test the stop_tone function from main.py"""
-    
-    @patch('main.buzzer_pin')
-    def test_stop_tone_success(self, mock_buzzer):
-        """Test stop_tone function with successful execution"""
-        print("\n" + "="*80)
-        print("TEST: test_stop_tone_success")
-        print("FUNCTION: stop_tone()")
-        print("PURPOSE: Stops any currently playing sound by setting buzzer duty cycle to 0")
-        print("LOCATION: src/main.py, line 132")
-        print("METHOD: Mock buzzer_pin, call function, verify duty_u16(0) called")
-        
-        stop_tone()
-        
-        # Should set duty cycle to 0 (silence)
-        mock_buzzer.duty_u16.assert_called_once_with(0)
-        
-        print("RESULT: PASS - Buzzer duty cycle set to 0 (silence)")
-        print("="*80)
-    
-    @patch('main.buzzer_pin')
-    def test_stop_tone_exception_handling(self, mock_buzzer):
-        """Test stop_tone function handles exceptions gracefully"""
-        print("\n" + "="*80)
-        print("TEST: test_stop_tone_exception_handling")
-        print("FUNCTION: stop_tone()")
-        print("PURPOSE: Stops any currently playing sound by setting buzzer duty cycle to 0")
-        print("LOCATION: src/main.py, line 132")
-        print("METHOD: Mock buzzer to raise exception, verify function handles it gracefully")
-        
-        # Make the buzzer raise an exception
-        mock_buzzer.duty_u16.side_effect = Exception("Hardware error")
-        
-        # Should not raise an exception
-        try:
-            stop_tone()
-        except Exception as e:
-            self.fail(f"stop_tone() raised {type(e).__name__}: {e}")
-        
-        print("RESULT: PASS - Exception handled gracefully, no crash")
-        print("="*80)
-
-
-class TestReadSensorCalibratedFunction(unittest.TestCase):
-    """Test the read_sensor_calibrated function from main.py"""
-    
-    @patch('main.photo_sensor_pin')
-    def test_read_sensor_uncalibrated(self, mock_sensor):
-        """Test sensor reading when not calibrated"""
-        print("\n" + "="*80)
-        print("TEST: test_read_sensor_uncalibrated")
-        print("FUNCTION: read_sensor_calibrated()")
-        print("PURPOSE: Reads light sensor and returns raw value + normalized value (0-1)")
-        print("LOCATION: src/main.py, line 100")
-        print("METHOD: Mock sensor to return 30000, set calibrated=False, verify fallback range used")
-        
-        # Mock sensor reading
-        mock_sensor.read_u16.return_value = 30000
-        
-        # Mock global variables
-        import main
-        main.calibrated = False
-        
-        raw, norm = read_sensor_calibrated()
-        
-        # Should use fallback range
-        self.assertEqual(raw, 30000)
-        self.assertGreaterEqual(norm, 0.0)
-        self.assertLessEqual(norm, 1.0)
-        
-        print(f"RESULT: PASS - Raw: {raw}, Normalized: {norm:.3f} (using fallback range)")
-        print("="*80)
-    
-    @patch('main.photo_sensor_pin')
-    def test_read_sensor_calibrated(self, mock_sensor):
-        """Test sensor reading when calibrated"""
-        print("\n" + "="*80)
-        print("TEST: test_read_sensor_calibrated")
-        print("FUNCTION: read_sensor_calibrated()")
-        print("PURPOSE: Reads light sensor and returns raw value + normalized value (0-1)")
-        print("LOCATION: src/main.py, line 100")
-        print("METHOD: Mock sensor to return 35000, set calibrated=True with floor/ceiling, verify calibrated range")
-        
-        # Mock sensor reading
-        mock_sensor.read_u16.return_value = 35000
-        
-        # Mock global variables
-        import main
-        main.calibrated = True
-        main.ambient_light_floor = 20000
-        main.ambient_light_ceiling = 40000
-        
-        raw, norm = read_sensor_calibrated()
-        
-        # Should use calibrated range
-        self.assertEqual(raw, 35000)
-        expected_norm = (35000 - 20000) / (40000 - 20000)  # 0.75
-        self.assertAlmostEqual(norm, expected_norm, places=3)
-        
-        print(f"RESULT: PASS - Raw: {raw}, Normalized: {norm:.3f} (using calibrated range 20000-40000)")
-        print("="*80)
-    
-    @patch('main.photo_sensor_pin')
-    def test_read_sensor_clamping(self, mock_sensor):
-        """Test that normalized values are properly clamped"""
-        print("\n" + "="*80)
-        print("TEST: test_read_sensor_clamping")
-        print("FUNCTION: read_sensor_calibrated()")
-        print("PURPOSE: Reads light sensor and returns raw value + normalized value (0-1)")
-        print("LOCATION: src/main.py, line 100")
-        print("METHOD: Test values below floor (10000) and above ceiling (50000) to verify clamping")
-        
-        # Mock global variables
-        import main
-        main.calibrated = True
-        main.ambient_light_floor = 20000
-        main.ambient_light_ceiling = 40000
-        
-        # Test value below floor
-        mock_sensor.read_u16.return_value = 10000
-        raw1, norm1 = read_sensor_calibrated()
-        self.assertEqual(norm1, 0.0)
-        
-        # Test value above ceiling
-        mock_sensor.read_u16.return_value = 50000
-        raw2, norm2 = read_sensor_calibrated()
-        self.assertEqual(norm2, 1.0)
-        
-        print(f"RESULT: PASS - Below floor (10000) → norm {norm1}, Above ceiling (50000) → norm {norm2}")
-        print("="*80)
-
-
-class TestCalibrateSensorFunction(unittest.TestCase):
-    """Test the calibrate_sensor function from main.py"""
-    
-    @patch('main.photo_sensor_pin')
-    @patch('main.buzzer_pin')
-    @patch('main.time.sleep')
-    def test_calibrate_sensor_basic(self, mock_sleep, mock_buzzer, mock_sensor):
-        """Test basic calibration functionality"""
-        print("\n" + "="*80)
-        print("TEST: test_calibrate_sensor_basic")
-        print("FUNCTION: calibrate_sensor(duration_ms=3000)")
-        print("PURPOSE: Calibrates light sensor by finding min/max values over time period")
-        print("LOCATION: src/main.py, line 45")
-        print("METHOD: Mock sensor readings, time functions, and buzzer, verify calibration completes")
-        
-        # Mock time functions - use the global mock we set up
-        import main
-        main.time.ticks_ms.side_effect = [0, 100, 200, 300, 400, 500, 600, 700, 800, 900, 1000, 1100, 1200, 1300, 1400, 1500, 1600, 1700, 1800, 1900, 2000, 2100, 2200, 2300, 2400, 2500, 2600, 2700, 2800, 2900, 3000, 3100]
-        main.time.ticks_diff.side_effect = lambda a, b: a - b  # Simple subtraction for ticks_diff
-        
-        # Mock sensor readings (simulate covering and uncovering)
-        mock_sensor.read_u16.side_effect = [1000, 2000, 3000, 4000, 5000, 6000, 7000, 8000, 9000, 10000, 11000, 12000, 13000, 14000, 15000, 16000, 17000, 18000, 19000, 20000, 21000, 22000, 23000, 24000, 25000, 26000, 27000, 28000, 29000, 30000, 31000]
-        
-        # Mock global variables
-        import main
-        main.calibrated = False
-        
-        # Run calibration
+# Calibration test inputs as immutable module-level data: allocated once
+# at import and reused across reruns. Sized with headroom beyond what
+# the calibration loop consumes so a shape change cannot starve them.
+_TICKS = tuple(range(0, 6400, 100))
+_READS = tuple(range(1000, 64000, 1000))
+
+
+@pytest.fixture
+def default_sensor_range(main_mod):
+    """Pin main.sensor_range to the default for a test, then restore."""
+    original = getattr(main_mod, 'sensor_range', 100)
+    main_mod.sensor_range = 100
+    yield
+    main_mod.sensor_range = original
+
+
+# --- light_to_note_index ---
+
+# light_to_note_index cases: input and the allowed note-index range.
+# Exact expectations (edges, clamping) use lo == hi.
+_LIGHT_CASES = [
+    (0.5, 0, 11),   # middle value lands somewhere on the scale
+    (0.0, 0, 0),    # minimum input maps to the first note
+    (1.0, 11, 11),  # maximum input maps to the last note
+    (-1.0, 0, 0),   # negative input clamps to the first note
+    (2.0, 11, 11),  # oversized input clamps to the last note
+]
+
+
+@pytest.mark.parametrize("norm_value,lo,hi", _LIGHT_CASES)
+def test_light_to_note_index_mapping(default_sensor_range, norm_value, lo, hi):
+    """light_to_note_index maps/clamps normalized light to 0-11."""
+    result = light_to_note_index(norm_value)
+    assert lo <= result <= hi
+
+
+def test_light_to_note_index_sensitivity(default_sensor_range):
+    """The sensitivity parameter changes the mapping curve."""
+    result_low_sens = light_to_note_index(0.5, sensitivity=0.1)
+    result_high_sens = light_to_note_index(0.5, sensitivity=0.9)
+    assert result_low_sens != result_high_sens
+
+
+# --- stop_tone ---
+
+def test_stop_tone_success(buzzer_mock):
+    """stop_tone sets the buzzer duty cycle to 0 (silence)."""
+    log.debug("TEST: test_stop_tone_success")
+    log.debug("METHOD: Mock buzzer_pin, call function, verify duty_u16(0) called")
+
+    stop_tone()
+
+    buzzer_mock.duty_u16.assert_called_once_with(0)
+    log.debug("RESULT: PASS - Buzzer duty cycle set to 0 (silence)")
+
+
+def test_stop_tone_exception_handling(buzzer_mock):
+    """stop_tone swallows hardware errors instead of crashing."""
+    log.debug("TEST: test_stop_tone_exception_handling")
+    log.debug("METHOD: Mock buzzer to raise exception, verify function handles it gracefully")
+
+    buzzer_mock.duty_u16.side_effect = Exception("Hardware error")
+
+    # Must not raise
+    stop_tone()
+    log.debug("RESULT: PASS - Exception handled gracefully, no crash")
+
+
+# --- read_sensor_calibrated ---
+
+def test_read_sensor_uncalibrated(sensor_mock):
+    """Uncalibrated reads fall back to the default range."""
+    log.debug("TEST: test_read_sensor_uncalibrated")
+    log.debug("METHOD: Mock sensor to return 30000, set calibrated=False, verify fallback range used")
+
+    sensor_mock.read_u16.return_value = 30000
+    main.calibrated = False
+
+    raw, norm = read_sensor_calibrated()
+
+    assert raw == 30000
+    assert 0.0 <= norm <= 1.0
+    log.debug("RESULT: PASS - Raw: %d, Normalized: %.3f (using fallback range)", raw, norm)
+
+
+def test_read_sensor_calibrated(sensor_mock):
+    """Calibrated reads normalize against the stored floor/ceiling."""
+    log.debug("TEST: test_read_sensor_calibrated")
+    log.debug("METHOD: Mock sensor to return 35000, set calibrated=True with floor/ceiling, verify calibrated range")
+
+    sensor_mock.read_u16.return_value = 35000
+    main.calibrated = True
+    main.ambient_light_floor = 20000
+    main.ambient_light_ceiling = 40000
+
+    raw, norm = read_sensor_calibrated()
+
+    assert raw == 35000
+    expected_norm = (35000 - 20000) / (40000 - 20000)  # 0.75
+    assert abs(norm - expected_norm) < 1e-3
+    log.debug("RESULT: PASS - Raw: %d, Normalized: %.3f (using calibrated range 20000-40000)", raw, norm)
+
+
+def test_read_sensor_clamping(sensor_mock):
+    """Normalized values are clamped to 0.0-1.0 outside the range."""
+    log.debug("TEST: test_read_sensor_clamping")
+    log.debug("METHOD: Test values below floor (10000) and above ceiling (50000) to verify clamping")
+
+    main.calibrated = True
+    main.ambient_light_floor = 20000
+    main.ambient_light_ceiling = 40000
+
+    # Value below floor
+    sensor_mock.read_u16.return_value = 10000
+    raw1, norm1 = read_sensor_calibrated()
+    assert norm1 == 0.0
+
+    # Value above ceiling
+    sensor_mock.read_u16.return_value = 50000
+    raw2, norm2 = read_sensor_calibrated()
+    assert norm2 == 1.0
+    log.debug("RESULT: PASS - Below floor (10000) -> norm %s, Above ceiling (50000) -> norm %s", norm1, norm2)
+
+
+# --- calibrate_sensor ---
+
+def test_calibrate_sensor_basic(sensor_mock, buzzer_mock):
+    """Calibration sweeps the sensor and produces a usable floor/ceiling."""
+    log.debug("TEST: test_calibrate_sensor_basic")
+    log.debug("METHOD: Mock sensor readings, time functions, and buzzer, verify calibration completes")
+
+    # Mock time functions - use the global mock conftest set up
+    main.time.ticks_ms.side_effect = iter(_TICKS)
+
+    # Mock sensor readings (simulate covering and uncovering)
+    sensor_mock.read_u16.side_effect = iter(_READS)
+
+    main.calibrated = False
+
+    with patch('main.time.sleep'):
         floor, ceiling = calibrate_sensor(duration_ms=3000)
-        
-        # Check that calibration was successful
-        self.assertIsNotNone(floor)
-        self.assertIsNotNone(ceiling)
-        self.assertLess(floor, ceiling)
-        
-        # Check that buzzer was used for indication
-        self.assertGreater(mock_buzzer.freq.call_count, 0)
-        self.assertGreater(mock_buzzer.duty_u16.call_count, 0)
-        
-        print(f"RESULT: PASS - Calibration completed: floor={floor}, ceiling={ceiling}, buzzer calls={mock_buzzer.freq.call_count}")
-        print("="*80)
-
-
-class TestConductorFunctions(unittest.TestCase):
-    """Test functions from conductor.py"""
-    
-    @patch('conductor.requests.post')
-    def test_play_note_on_all_picos(self, mock_post):
-        """Test playing note on all Picos"""
-        print("\n" + "="*80)
-        print("TEST: test_play_note_on_all_picos")
-        print("FUNCTION: play_note_on_all_picos(freq, ms)")
-        print("PURPOSE: Sends tone requests to multiple Pico devices via HTTP POST")
-        print("LOCATION: src/conductor.py, line 59")
-        print("METHOD: Mock requests.post, override PICO_IPS, verify HTTP calls to all IPs")
-        
-        # Mock successful response
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_post.return_value = mock_response
-        
-        # Test with mock IPs
-        import conductor
-        original_ips = conductor.PICO_IPS
-        conductor.PICO_IPS = ["192.168.1.101", "192.168.1.102"]
-        
-        try:
-            play_note_on_all_picos(440, 1000)
-            
-            # Verify requests were made to all IPs
-            self.assertEqual(mock_post.call_count, 2)
-            
-            # Check the URLs
-            calls = mock_post.call_args_list
-            self.assertEqual(calls[0][0][0], "http://192.168.1.101/tone")
-            self.assertEqual(calls[1][0][0], "http://192.168.1.102/tone")
-            
-        finally:
-            # Restore original PICO_IPS
-            conductor.PICO_IPS = original_ips
-        
-        print(f"RESULT: PASS - Sent {mock_post.call_count} HTTP POST requests to tone endpoints")
-        print("="*80)
-    
-    @patch('conductor.requests.get')
-    def test_get_pico_health_success(self, mock_get):
-        """Test successful health check"""
-        print("\n" + "="*80)
-        print("TEST: test_get_pico_health_success")
-        print("FUNCTION: get_pico_health(ip)")
-        print("PURPOSE: Retrieves health status from a Pico device via HTTP GET")
-        print("LOCATION: src/conductor.py, line 114")
-        print("METHOD: Mock requests.get, verify correct URL and response parsing")
-        
-        # Mock successful response
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "status": "active",
-            "device_id": "pico-test-123",
-            "api": "v2.0",
-            "calibrated": True
-        }
-        mock_get.return_value = mock_response
-        
-        result = get_pico_health("192.168.1.101")
-        
-        # Verify the request was made
-        mock_get.assert_called_once_with("http://192.168.1.101/health", timeout=0.5)
-        
-        # Verify the result
-        self.assertEqual(result["status"], "active")
-        self.assertEqual(result["device_id"], "pico-test-123")
-        self.assertEqual(result["api"], "v2.0")
-        self.assertTrue(result["calibrated"])
-        
-        print(f"RESULT: PASS - Health check successful: {result['status']}, Device: {result['device_id']}")
-        print("="*80)
-    
-    @patch('conductor.requests.get')
-    def test_get_sensor_data_success(self, mock_get):
-        """Test successful sensor data retrieval"""
-        print("\n" + "="*80)
-        print("TEST: test_get_sensor_data_success")
-        print("FUNCTION: get_sensor_data(ip)")
-        print("PURPOSE: Retrieves sensor data from a Pico device via HTTP GET")
-        print("LOCATION: src/conductor.py, line 131")
-        print("METHOD: Mock requests.get, verify correct URL and response parsing")
-        
-        # Mock successful response
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "raw": 30000,
-            "norm": 0.75,
-            "floor": 20000,
-            "ceiling": 40000,
-            "calibrated": True,
-            "lux_est": 120.4  # Add missing field that conductor.py expects
-        }
-        mock_get.return_value = mock_response
-        
-        result = get_sensor_data("192.168.1.101")
-        
-        # Verify the request was made
-        mock_get.assert_called_once_with("http://192.168.1.101/sensor", timeout=0.5)
-        
-        # Verify the result
-        self.assertEqual(result["raw"], 30000)
-        self.assertEqual(result["norm"], 0.75)
-        self.assertEqual(result["floor"], 20000)
-        self.assertEqual(result["ceiling"], 40000)
-        self.assertTrue(result["calibrated"])
-        
-        print(f"RESULT: PASS - Sensor data retrieved: raw={result['raw']}, norm={result['norm']}, calibrated={result['calibrated']}")
-        print("="*80)
-    
-    @patch('conductor.requests.get')
-    def test_get_device_mode_success(self, mock_get):
-        """Test successful device mode retrieval"""
-        print("\n" + "="*80)
-        print("TEST: test_get_device_mode_success")
-        print("FUNCTION: get_device_mode(ip)")
-        print("PURPOSE: Retrieves device mode from a Pico device via HTTP GET")
-        print("LOCATION: src/conductor.py, line 151")
-        print("METHOD: Mock requests.get, verify correct URL and response parsing")
-        
-        # Mock successful response
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "mode": "Live Play",
-            "is_recording": False,
-            "is_playing": False,
-            "melody_length": 0
-        }
-        mock_get.return_value = mock_response
-        
-        result = get_device_mode("192.168.1.101")
-        
-        # Verify the request was made
-        mock_get.assert_called_once_with("http://192.168.1.101/get_mode", timeout=0.5)
-        
-        # Verify the result
-        self.assertEqual(result["mode"], "Live Play")
-        self.assertFalse(result["is_recording"])
-        self.assertFalse(result["is_playing"])
-        self.assertEqual(result["melody_length"], 0)
-        
-        print(f"RESULT: PASS - Device mode retrieved: {result['mode']}, recording={result['is_recording']}, playing={result['is_playing']}")
-        print("="*80)
-
-
-class TestConductorErrorHandling(unittest.TestCase):
-    """Test error handling in conductor functions"""
-    
-    def test_error_handling_placeholder(self):
-        """Placeholder test for error handling - conductor functions have complex exception handling"""
-        print("\n" + "="*80)
-        print("TEST: test_error_handling_placeholder")
-        print("FUNCTION: Various conductor functions (error handling)")
-        print("PURPOSE: Tests error handling in conductor functions")
-        print("LOCATION: src/conductor.py (multiple functions)")
-        print("METHOD: Placeholder test - complex exception handling difficult to mock")
-        
-        # Note: The conductor functions have complex exception handling that's difficult to test
-        # with mocked requests due to the way requests.exceptions are structured
-        # In a real test environment, these would be tested with actual network calls
-        self.assertTrue(True)  # Placeholder assertion
-        
-        print("RESULT: PASS - Placeholder test (error handling tested in integration)")
-        print("="*80)
+
+    assert floor is not None
+    assert ceiling is not None
+    assert floor < ceiling
+
+    # The buzzer signals calibration progress
+    assert buzzer_mock.freq.call_count > 0
+    assert buzzer_mock.duty_u16.call_count > 0
+    log.debug("RESULT: PASS - Calibration completed: floor=%s, ceiling=%s, buzzer calls=%d", floor, ceiling, buzzer_mock.freq.call_count)
+
+
+# --- conductor ---
+
+def test_play_note_on_all_picos(monkeypatch, mock_post):
+    """play_note_on_all_picos POSTs a tone request to every configured IP."""
+    log.debug("TEST: test_play_note_on_all_picos")
+    log.debug("METHOD: Mock SESSION.post, override PICO_IPS, verify HTTP calls to all IPs")
+    log.debug("NOTE: Dispatch is fanned out via a thread pool, so call order is not guaranteed")
+
+    # Mock successful response; a SimpleNamespace keeps attribute
+    # access a plain lookup instead of Mock's child resolution
+    mock_post.return_value = SimpleNamespace(status_code=200)
+
+    # Test with mock IPs; monkeypatch restores the original on teardown
+    monkeypatch.setattr(conductor, "PICO_IPS", ["192.168.1.101", "192.168.1.102"])
+
+    play_note_on_all_picos(440, 1000)
+
+    # Verify requests were made to all IPs
+    assert mock_post.call_count == 2
+
+    # Check the URLs (thread-pool dispatch does not guarantee order)
+    urls = {call[0][0] for call in mock_post.call_args_list}
+    assert urls == {"http://192.168.1.101/tone", "http://192.168.1.102/tone"}
+
+    log.debug("RESULT: PASS - Sent %d HTTP POST requests to tone endpoints", mock_post.call_count)
+
+
+def test_get_pico_health_success(mock_get):
+    """get_pico_health hits /health and parses the response."""
+    log.debug("TEST: test_get_pico_health_success")
+    log.debug("METHOD: Mock SESSION.get, verify correct URL and response parsing")
+
+    data = {
+        "status": "active",
+        "device_id": "pico-test-123",
+        "api": "v2.0",
+        "calibrated": True
+    }
+    mock_get.return_value = SimpleNamespace(
+        status_code=200, json=lambda: data, content=json.dumps(data).encode())
+
+    result = get_pico_health("192.168.1.101")
+
+    mock_get.assert_called_once_with("http://192.168.1.101/health", timeout=0.5)
+
+    assert result["status"] == "active"
+    assert result["device_id"] == "pico-test-123"
+    assert result["api"] == "v2.0"
+    assert result["calibrated"]
+    log.debug("RESULT: PASS - Health check successful: %s, Device: %s", result['status'], result['device_id'])
+
+
+def test_get_sensor_data_success(mock_get):
+    """get_sensor_data hits /sensor and parses the response."""
+    log.debug("TEST: test_get_sensor_data_success")
+    log.debug("METHOD: Mock SESSION.get, verify correct URL and response parsing")
+
+    data = {
+        "raw": 30000,
+        "norm": 0.75,
+        "floor": 20000,
+        "ceiling": 40000,
+        "calibrated": True,
+        "lux_est": 120.4  # Add missing field that conductor.py expects
+    }
+    mock_get.return_value = SimpleNamespace(
+        status_code=200, json=lambda: data, content=json.dumps(data).encode())
+
+    result = get_sensor_data("192.168.1.101")
+
+    mock_get.assert_called_once_with("http://192.168.1.101/sensor", timeout=0.5)
+
+    assert result["raw"] == 30000
+    assert result["norm"] == 0.75
+    assert result["floor"] == 20000
+    assert result["ceiling"] == 40000
+    assert result["calibrated"]
+    log.debug("RESULT: PASS - Sensor data retrieved: raw=%d, norm=%s, calibrated=%s", result['raw'], result['norm'], result['calibrated'])
+
+
+def test_get_device_mode_success(mock_get):
+    """get_device_mode hits /get_mode and parses the response."""
+    log.debug("TEST: test_get_device_mode_success")
+    log.debug("METHOD: Mock SESSION.get, verify correct URL and response parsing")
+
+    data = {
+        "mode": "Live Play",
+        "is_recording": False,
+        "is_playing": False,
+        "melody_length": 0
+    }
+    mock_get.return_value = SimpleNamespace(
+        status_code=200, json=lambda: data, content=json.dumps(data).encode())
+
+    result = get_device_mode("192.168.1.101")
+
+    mock_get.assert_called_once_with("http://192.168.1.101/get_mode", timeout=0.5)
+
+    assert result["mode"] == "Live Play"
+    assert not result["is_recording"]
+    assert not result["is_playing"]
+    assert result["melody_length"] == 0
+    log.debug("RESULT: PASS - Device mode retrieved: %s, recording=%s, playing=%s", result['mode'], result['is_recording'], result['is_playing'])
+
+
+def test_error_handling_placeholder():
+    """Placeholder test for error handling - conductor functions have complex exception handling"""
+    # Note: The conductor functions have complex exception handling that's difficult to test
+    # with mocked requests due to the way requests.exceptions are structured
+    # In a real test environment, these would be tested with actual network calls
+    assert True  # Placeholder assertion
 
 
 if __name__ == '__main__':
-    print("Running Function Tests for Pico Light Orchestra")
-    print("=" * 60)
-    print("Testing functions that actually exist in the codebase:")
-    print("- light_to_note_index (main.py)")
-    print("- stop_tone (main.py)")
-    print("- read_sensor_calibrated (main.py)")
-    print("- calibrate_sensor (main.py)")
-    print("- play_note_on_all_picos (conductor.py)")
-    print("- get_pico_health (conductor.py)")
-    print("- get_sensor_data (conductor.py)")
-    print("- get_device_mode (conductor.py)")
-    print("=" * 60)
-    unittest.main(verbosity=2)
\ No newline at end of file
+    # Fan out across cores with pytest-xdist. loadfile keeps all tests
+    # from this file on one worker, since they mutate main's module
+    # globals (sensor_range, calibrated, ambient_light_floor/ceiling)
+    # and must not race across processes.
+    import pytest
+    sys.exit(pytest.main(["-n", "auto", "--dist", "loadfile", __file__]))